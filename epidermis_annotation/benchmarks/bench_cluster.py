@@ -0,0 +1,76 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import time
+import argparse
+import numpy as np
+from checks import check
+from skimage.measure import label
+from cluster import Cluster
+
+
+def legacy_cluster_amount(orig_img, inner_epi, pixel_width, green_threshold) -> int:
+    """ Per-pixel reference implementation of `Cluster.get_cluster_amount` (before vectorization). """
+    inner_epi_green_windows = []
+    for y, x in inner_epi:
+        if (x - pixel_width) < 0 or (x + pixel_width + 1) > (orig_img.shape[1] - 1):
+            continue
+        green_channel_window = []
+        for i in range(x - pixel_width, x + pixel_width + 1):
+            green_channel = orig_img[:, :, 1][y][i]
+            green_channel_window.append(green_channel if green_channel > green_threshold else 0)
+        inner_epi_green_windows.append(green_channel_window)
+    return label(np.array(inner_epi_green_windows), return_num=True)[1]
+
+
+def synthetic_input(size, seed) -> tuple:
+    """ Creates a noisy rgb image and a wavy, roughly vertical edge running through it.
+
+    Args:
+        size (int): Height and width of the image
+        seed (int): Random seed
+
+    Returns:
+        orig_img (3d array): Random image with bright green blobs
+        inner_epi (list): [y, x] coordinates of the edge
+    """
+    rng = np.random.default_rng(seed)
+    orig_img = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    # quantize, so neighbouring pixels often share a value and form clusters
+    orig_img[:, :, 1] = orig_img[:, :, 1] // 32 * 32
+    ys = np.arange(size)
+    xs = (size // 2 + size // 8 * np.sin(ys / size * 6 * np.pi)).astype(int)
+    return orig_img, [[int(y), int(x)] for y, x in zip(ys, xs)]
+
+
+def main():
+    """ Compares the per-pixel and the vectorized window extraction on synthetic images. """
+    parser = argparse.ArgumentParser(description="Cluster window extraction: per-pixel loops vs. NumPy.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000], help="Image sizes in pixels.")
+    parser.add_argument("--pixel-width", type=int, default=50, help="Window width left and right of the edge.")
+    parser.add_argument("--green-threshold", type=int, default=200, help="Green value threshold.")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        orig_img, inner_epi = synthetic_input(size, seed=size)
+
+        start = time.perf_counter()
+        legacy_amount = legacy_cluster_amount(orig_img, inner_epi, args.pixel_width, args.green_threshold)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cluster = Cluster(orig_img=orig_img, inner_epi=inner_epi, pixel_width=args.pixel_width,
+                          green_threshold=args.green_threshold)
+        cluster_amount, _ = cluster.get_cluster_amount()
+        seconds = time.perf_counter() - start
+
+        check(cluster_amount == legacy_amount,
+              f"size={size}: {cluster_amount} clusters, the former cluster counted {legacy_amount}")
+        print(f"size={size:6d}  clusters={cluster_amount:6d}  loops={legacy_seconds:.3f}s  numpy={seconds:.4f}s  "
+              f"speedup={legacy_seconds / seconds:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import time
+import argparse
+import tempfile
+import cv2
+import numpy as np
+from checks import check
+from bench_walker import synthetic_annotation
+import run_annotation
+
+
+def write_cohort(img_dir, subjects, size):
+    """ Writes synthetic image pairs (curved band annotation, noisy original image) as PNG files.
+
+    Args:
+        img_dir (str): Output directory
+        subjects (int): Number of image pairs
+        size (int): Height and width of the images
+    """
+    annotation_img = synthetic_annotation(size)
+    for subject in range(subjects):
+        orig_img = np.random.default_rng(subject).integers(0, 256, (size, size, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(img_dir, "{}_Annotation.png".format(subject)), np.roll(annotation_img, subject,
+                                                                                         axis=1))
+        cv2.imwrite(os.path.join(img_dir, "{}_HE.png".format(subject)), orig_img)
+
+
+def sweep(img_dir, thresholds, edge_cache_dir) -> tuple:
+    """ Runs the annotation of a directory once per green threshold.
+
+    Returns:
+        seconds (float): Duration of the sweep
+        results (list(list(dict))): Results table per threshold
+    """
+    start = time.perf_counter()
+    results = [run_annotation.run(img_dir=img_dir, output_dir=img_dir, visualize=False,
+                                  green_threshold=green_threshold, edge_cache_dir=edge_cache_dir)
+               for green_threshold in thresholds]
+    return time.perf_counter() - start, results
+
+
+def main():
+    """ Compares a green threshold sweep with and without the edge cache. """
+    parser = argparse.ArgumentParser(description="Green threshold sweep with and without the edge cache.")
+    parser.add_argument("--subjects", type=int, default=8, help="Number of image pairs.")
+    parser.add_argument("--size", type=int, default=3000, help="Image size in pixels.")
+    parser.add_argument("--thresholds", type=int, default=20, help="Number of green thresholds.")
+    args = parser.parse_args()
+    thresholds = np.linspace(100, 250, args.thresholds).astype(int).tolist()
+
+    with tempfile.TemporaryDirectory() as img_dir, tempfile.TemporaryDirectory() as cache_dir:
+        write_cohort(img_dir, args.subjects, args.size)
+        # the sweep prints one line per pair and threshold
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                seconds, results = sweep(img_dir, thresholds, edge_cache_dir=None)
+                cached_seconds, cached_results = sweep(img_dir, thresholds, edge_cache_dir=cache_dir)
+                warm_seconds, warm_results = sweep(img_dir, thresholds, edge_cache_dir=cache_dir)
+            finally:
+                sys.stdout = stdout
+
+        def counts(tables):
+            return [[(row["inner_epidermis_length"], row["cluster_amount"]) for row in table] for table in tables]
+        check(counts(results) == counts(cached_results) == counts(warm_results), "cached results differ")
+        print(f"{args.subjects} pairs of {args.size}px, {args.thresholds} thresholds:  without cache={seconds:.1f}s  "
+              f"cold cache={cached_seconds:.1f}s  warm cache={warm_seconds:.1f}s  "
+              f"({len(os.listdir(cache_dir))} cache entries)")
+
+
+if __name__ == '__main__':
+    main()
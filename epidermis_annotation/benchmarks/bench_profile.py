@@ -0,0 +1,51 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import json
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+from checks import check
+from synthetic import write_pairs
+import run_annotation
+
+
+def main():
+    """ Profiles the stages of the pipeline on synthetic image pairs and checks the results against the truth. """
+    parser = argparse.ArgumentParser(description="Per-stage profile of run_annotation on synthetic image pairs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000], help="Image sizes in pixels.")
+    parser.add_argument("--subjects", type=int, default=4, help="Number of image pairs per size.")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record the peak memory per stage.")
+    parser.add_argument("--report", default=None, help="Write the full JSON report of the last size to this path.")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as img_dir:
+            truths = write_pairs(img_dir, size, args.subjects)
+            profile_path = os.path.join(img_dir, "profile.json")
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                results = run_annotation.run(img_dir=img_dir, output_dir=img_dir, profile_path=profile_path,
+                                             trace_memory=args.trace_memory)
+            with open(profile_path) as profile_file:
+                report = json.load(profile_file)
+
+        for row in results:
+            check(not row["error"], row["error"])
+            check(row["cluster_amount"] == len(truths[row["subject"]]["cluster_rows"]), f"wrong cluster amount: {row}")
+
+        aggregate = report["aggregate"]
+        max_rss = f"{aggregate['max_rss_mb']:.0f}MB" if aggregate["max_rss_mb"] is not None else "n/a"
+        print(f"size={size}  pairs={aggregate['images']}  total={aggregate['seconds']:.2f}s  max rss={max_rss}")
+        for name, stage in aggregate["stages"].items():
+            peak = f"  peak={stage['max_peak_mb']:.1f}MB" if "max_peak_mb" in stage else ""
+            print(f"  {name:16s} mean={stage['mean_seconds'] * 1000:8.1f}ms  share={stage['share'] * 100:5.1f}%{peak}")
+        if args.report is not None:
+            with open(args.report, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
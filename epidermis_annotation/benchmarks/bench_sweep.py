@@ -0,0 +1,45 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import time
+import argparse
+import numpy as np
+from checks import check
+from bench_cluster import synthetic_input
+from cluster import Cluster
+from sweep import sweep_cluster_amounts
+
+
+def main():
+    """ Compares the sweep with one `Cluster` run per parameter combination on synthetic images. """
+    parser = argparse.ArgumentParser(description="Cluster parameter sweep: one run per combination vs. shared band.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000], help="Image sizes in pixels.")
+    parser.add_argument("--pixel-widths", type=int, nargs="+", default=[10, 25, 50, 75, 100],
+                        help="Pixel widths of the grid.")
+    parser.add_argument("--thresholds", type=int, default=20, help="Number of green thresholds of the grid.")
+    args = parser.parse_args()
+    green_thresholds = np.linspace(0, 250, args.thresholds).astype(int).tolist()
+
+    for size in args.sizes:
+        orig_img, inner_epi = synthetic_input(size, seed=size)
+
+        start = time.perf_counter()
+        expected = np.array([[Cluster(orig_img=orig_img, inner_epi=inner_epi, pixel_width=pixel_width,
+                                      green_threshold=green_threshold).get_cluster_amount()[0]
+                              for green_threshold in green_thresholds] for pixel_width in args.pixel_widths])
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cluster_amounts = sweep_cluster_amounts(orig_img=orig_img, inner_epi=inner_epi,
+                                                pixel_widths=args.pixel_widths, green_thresholds=green_thresholds)
+        seconds = time.perf_counter() - start
+
+        check(np.array_equal(cluster_amounts, expected), f"size={size}: sweep differs from separate runs")
+        print(f"size={size:6d}  combinations={expected.size:4d}  per combination={single_seconds:.3f}s  "
+              f"sweep={seconds:.4f}s  speedup={single_seconds / seconds:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
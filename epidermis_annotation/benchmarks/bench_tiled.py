@@ -0,0 +1,109 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from checks import check
+from profiling import max_rss_mb
+
+
+def write_synthetic_slide(directory, size, band_rows=1024) -> tuple:
+    """ Writes a synthetic image pair as .npy files band by band, so slides larger than the memory can be created.
+
+    The annotation is a curved band from the bottom to the top of the image, the original image is gray with bright
+    green spots.
+
+    Args:
+        directory (str): Output directory
+        size (int): Height and width of the images
+        band_rows (int): Rows written at once
+
+    Returns:
+        annot_file (str): File name of the annotation
+        orig_file (str): File name of the original image
+    """
+    annot_file = "{}_Annotation.npy".format(size)
+    orig_file = "{}_HE.npy".format(size)
+    annot_img = np.lib.format.open_memmap(os.path.join(directory, annot_file), mode="w+", dtype=np.uint8,
+                                          shape=(size, size))
+    orig_img = np.lib.format.open_memmap(os.path.join(directory, orig_file), mode="w+", dtype=np.uint8,
+                                         shape=(size, size, 3))
+    rng = np.random.default_rng(size)
+    columns = np.arange(size)
+    for start in range(0, size, band_rows):
+        rows = np.arange(start, min(start + band_rows, size))
+        centers = size / 2 + size / 6 * np.sin(rows / size * 3 * np.pi)
+        annot_img[rows] = np.where(np.abs(columns[None, :] - centers[:, None]) < size / 10, 255, 0)
+        band = np.full((len(rows), size, 3), 120, dtype=np.uint8)
+        band[:, :, 1] = np.where(rng.random((len(rows), size)) < 0.05, 230, 120)
+        orig_img[rows] = band
+    annot_img.flush()
+    orig_img.flush()
+    del annot_img, orig_img
+    return annot_file, orig_file
+
+
+def measure(img_dir, annot_file, orig_file, tile_size) -> tuple:
+    """ Processes one image pair; runs in a fresh process, so the peak memory only belongs to this pair.
+
+    Returns:
+        result (dict): Row of the results table
+        baseline_mb (float): Peak memory after the imports in MB
+        peak_mb (float): Peak memory after processing in MB
+    """
+    from run_annotation import process_pair
+
+    baseline_mb = max_rss_mb()
+    result, _ = process_pair(img_dir=img_dir, annot_file=annot_file, orig_file=orig_file, pixel_width=50,
+                              green_threshold=200, visualize=True, tile_size=tile_size)
+    return result, baseline_mb, max_rss_mb()
+
+
+def main():
+    """ Compares the peak memory of whole-image and tiled processing on synthetic slides. """
+    parser = argparse.ArgumentParser(description="Peak memory of whole-image vs. tiled processing.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 16000], help="Slide sizes in pixels.")
+    parser.add_argument("--tile-sizes", type=int, nargs="+", default=[512, 2048], help="Tile sizes in pixels.")
+    parser.add_argument("--skip-full-above", type=int, default=8000,
+                        help="Do not read larger slides completely (needs about 8 bytes per pixel).")
+    parser.add_argument("--dir", default=None, help="Directory for the slides (default: a temporary directory).")
+    args = parser.parse_args()
+    if max_rss_mb() is None:
+        sys.exit("The peak memory of a process cannot be measured on this platform.")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as img_dir:
+        for size in args.sizes:
+            # written in another process, the peak memory of the parent carries over to the measuring processes
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                annot_file, orig_file = executor.submit(write_synthetic_slide, img_dir, size).result()
+            full_result = None
+            for tile_size in ([None] if size <= args.skip_full_above else []) + args.tile_sizes:
+                # a fresh process per run, the peak memory of a process never decreases
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    start = time.perf_counter()
+                    result, baseline_mb, peak_mb = executor.submit(measure, img_dir, annot_file, orig_file,
+                                                                   tile_size).result()
+                    seconds = time.perf_counter() - start
+                check(not result["error"], result["error"])
+                if tile_size is None:
+                    full_result = result
+                elif full_result is not None:
+                    check(result["cluster_amount"] == full_result["cluster_amount"],
+                          f"size={size} tiles={tile_size}: cluster amount differs")
+                    check(result["inner_epidermis_length"] == full_result["inner_epidermis_length"],
+                          f"size={size} tiles={tile_size}: inner epidermis length differs")
+                print(f"size={size:6d}  tiles={str(tile_size or 'none'):>5}  clusters={result['cluster_amount']:6d}  "
+                      f"peak={peak_mb - baseline_mb:8.1f}MB (+{baseline_mb:.0f}MB imports)  time={seconds:.1f}s")
+            os.remove(os.path.join(img_dir, annot_file))
+            os.remove(os.path.join(img_dir, orig_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import time
+import argparse
+import numpy as np
+from checks import check
+from walker import Walker
+
+
+def legacy_run_walker(img_canny) -> list:
+    """ Reference implementation of `Walker._run_walker` (before the rewrite); quadratic in the edge length. """
+    starting_coord_walker = []
+    k = 1
+    while len(starting_coord_walker) == 0:
+        for i in range(img_canny.shape[1] - 1):
+            if img_canny[img_canny.shape[1] - k][i] > 128:
+                starting_coord_walker.append([img_canny.shape[1] - k, i])
+        k += 1
+
+    dy_orth, dx_orth = [1, 0, -1, 0], [0, 1, 0, -1]
+    dy_diag, dx_diag = [1, -1, -1, 1], [1, 1, -1, -1]
+    current_direction = 0
+    direction_counter = 0
+    annotation_edges = list()
+    for starting_point in starting_coord_walker:
+        coordinates = [starting_point]
+        reached_end = False
+        steps_counter = 0
+        while not reached_end:
+            if steps_counter > 200000:
+                break
+            if direction_counter > 4:
+                y = coordinates[-1][0] + dy_diag[current_direction]
+                x = coordinates[-1][1] + dx_diag[current_direction]
+            else:
+                y = coordinates[-1][0] + dy_orth[current_direction]
+                x = coordinates[-1][1] + dx_orth[current_direction]
+            if direction_counter > 8:
+                y = coordinates[-1][0] + [2, 0, -2, 0][current_direction]
+                x = coordinates[-1][1] + [0, 2, 0, -2][current_direction]
+            if direction_counter > 12:
+                y = coordinates[-1][0] + [2, -2, -2, 2][current_direction]
+                x = coordinates[-1][1] + [2, 2, -2, -2][current_direction]
+            if y < 0 or y > (img_canny.shape[0] - 1) or x < 0 or x > (img_canny.shape[1] - 1):
+                current_direction = (current_direction + 1) % 4
+                direction_counter += 1
+                if not len(coordinates) == 1:
+                    reached_end = True
+                continue
+            if img_canny[y][x] != 0 and not [y, x] in coordinates:
+                coordinates.append([y, x])
+                current_direction = 0
+                direction_counter = 0
+            else:
+                current_direction = (current_direction + 1) % 4
+                direction_counter += 1
+            steps_counter += 1
+        annotation_edges.append(coordinates)
+    return annotation_edges
+
+
+def synthetic_annotation(size) -> np.ndarray:
+    """ Creates a square annotation image with a curved band running from the bottom to the top.
+
+    Args:
+        size (int): Height and width of the image
+
+    Returns:
+        annotation_img (2d array): Band in white on black
+    """
+    annotation_img = np.zeros((size, size), dtype=np.uint8)
+    columns = np.arange(size)
+    for y in range(size):
+        center = size / 2 + size / 6 * np.sin(y / size * 3 * np.pi)
+        annotation_img[y, (columns > center - size / 10) & (columns < center + size / 10)] = 255
+    return annotation_img
+
+
+def main():
+    """ Compares the former and the linear-time edge tracing on synthetic annotations. """
+    parser = argparse.ArgumentParser(description="Walker edge tracing: list lookups vs. visited set.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000], help="Image sizes in pixels.")
+    parser.add_argument("--skip-legacy-above", type=int, default=4000,
+                        help="Do not run the quadratic reference implementation on larger images.")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        walker = Walker(annotation_img=synthetic_annotation(size))
+        img_canny = walker._get_img_canny()
+
+        start = time.perf_counter()
+        annotation_edges = walker._run_walker(img_canny=img_canny)
+        seconds = time.perf_counter() - start
+        line = f"size={size:6d}  edge pixels={sum(map(len, annotation_edges)):7d}  walker={seconds * 1000:.1f}ms"
+
+        if size <= args.skip_legacy_above:
+            start = time.perf_counter()
+            legacy_edges = legacy_run_walker(img_canny)
+            legacy_seconds = time.perf_counter() - start
+            check(annotation_edges == legacy_edges, f"size={size}: walker differs from the former walker")
+            line += f"  former={legacy_seconds * 1000:.1f}ms  speedup={legacy_seconds / seconds:.0f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
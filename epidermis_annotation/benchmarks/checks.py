@@ -0,0 +1,13 @@
+class RegressionError(Exception):
+    """ Raised if an output differs from the truth or from another implementation. """
+
+
+def check(condition, message):
+    """ Raises a RegressionError if the condition does not hold; unlike assert, also under python -O.
+
+    Args:
+        condition (bool): Checked condition
+        message (str): Description of the failure
+    """
+    if not condition:
+        raise RegressionError(message)
@@ -0,0 +1,194 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+from synthetic import synthetic_pair, BACKGROUND_GREEN, CLUSTER_GREEN, CLUSTER_HALF_LENGTH
+from checks import RegressionError, check
+from bench_walker import legacy_run_walker
+from bench_cluster import legacy_cluster_amount
+from walker import Walker
+from cluster import Cluster
+from tiled import ArrayImage, TiledWalker, TiledCluster
+from sweep import sweep_cluster_amounts
+from run_annotation import get_inner_epidermis
+
+
+# (pixel_width, green_threshold) combinations whose cluster amount is checked; every one counts exactly the planted
+# clusters
+CHECKED_PARAMETERS = ((CLUSTER_HALF_LENGTH + 2, BACKGROUND_GREEN), (50, 200), (20, CLUSTER_GREEN - 1))
+
+
+def check_edge(edge, edge_x, size):
+    """ Checks a traced edge against the known band edge: it runs from the lowest to the highest row, covers every
+        row, stays within one pixel of the band edge and takes walker steps (at most two pixels) only.
+
+    Args:
+        edge (list(list)): [y, x] coordinates of the traced edge
+        edge_x (1d array): Known x coordinate of the edge per row
+        size (int): Height and width of the image
+    """
+    coordinates = np.asarray(edge)
+    check(coordinates[0, 0] == size - 1 and coordinates[-1, 0] == 0, "edge does not run from the bottom to the top")
+    check(len(np.unique(coordinates[:, 0])) == size, "edge skips rows")
+    deviation = np.abs(coordinates[:, 1] - edge_x[coordinates[:, 0]]).max()
+    check(deviation <= 1, "edge deviates {} pixels from the band".format(deviation))
+    check(np.abs(np.diff(coordinates, axis=0)).max() <= 2, "edge jumps")
+
+
+def check_pair(size, phase, seed, legacy_max_size, tile_size) -> dict:
+    """ Runs `Walker` and `Cluster` on a synthetic pair, checks their outputs against the truth and the other
+        implementations and measures them.
+
+    Args:
+        size (int): Height and width of the images
+        phase (float): Phase of the band
+        seed (int): Random seed of the original image
+        legacy_max_size (int): Also compare with the former (quadratic) implementations up to this size
+        tile_size (int): Tile size of the tiled implementations
+
+    Returns:
+        record (dict): "size", "phase", "seconds" per step and "digest" (hash of the edges and cluster amounts, for
+                       comparing outputs between versions)
+    """
+    annotation_img, orig_img, truth = synthetic_pair(size, phase=phase, seed=seed)
+    seconds = dict()
+
+    walker = Walker(annotation_img=annotation_img)
+    start = time.perf_counter()
+    img_canny = walker._get_img_canny()
+    seconds["canny"] = time.perf_counter() - start
+    start = time.perf_counter()
+    annotation_edges = walker._run_walker(img_canny=img_canny)
+    seconds["walker"] = time.perf_counter() - start
+
+    check(len(annotation_edges) == 2, "{} edges instead of 2".format(len(annotation_edges)))
+    check_edge(annotation_edges[0], truth["left_x"], size)
+    check_edge(annotation_edges[1], truth["right_x"], size)
+    inner_epidermis = get_inner_epidermis(annotation_edges=annotation_edges)
+    check(inner_epidermis is annotation_edges[0 if truth["inner"] == "left" else 1], "wrong inner epidermis")
+
+    cluster_amounts = []
+    seconds["cluster"] = 0.0
+    for pixel_width, green_threshold in CHECKED_PARAMETERS:
+        start = time.perf_counter()
+        cluster_amount, _ = Cluster(orig_img=orig_img, inner_epi=inner_epidermis, pixel_width=pixel_width,
+                                    green_threshold=green_threshold).get_cluster_amount()
+        seconds["cluster"] += time.perf_counter() - start
+        check(cluster_amount == len(truth["cluster_rows"]), "{} clusters instead of {} ({}, {})".format(
+            cluster_amount, len(truth["cluster_rows"]), pixel_width, green_threshold))
+        cluster_amounts.append(cluster_amount)
+
+    # the other implementations must give the same results
+    pixel_widths = sorted({pixel_width for pixel_width, _ in CHECKED_PARAMETERS})
+    green_thresholds = sorted({green_threshold for _, green_threshold in CHECKED_PARAMETERS})
+    start = time.perf_counter()
+    swept = sweep_cluster_amounts(orig_img=orig_img, inner_epi=inner_epidermis, pixel_widths=pixel_widths,
+                                  green_thresholds=green_thresholds)
+    seconds["sweep"] = time.perf_counter() - start
+    for (pixel_width, green_threshold), cluster_amount in zip(CHECKED_PARAMETERS, cluster_amounts):
+        check(swept[pixel_widths.index(pixel_width), green_thresholds.index(green_threshold)] == cluster_amount,
+              "sweep differs")
+
+    start = time.perf_counter()
+    tiled_edges, _ = TiledWalker(annotation_img=ArrayImage(annotation_img), tile_size=tile_size).get_annotation_edges()
+    seconds["tiled_walker"] = time.perf_counter() - start
+    check(tiled_edges == annotation_edges, "tiled walker differs")
+    pixel_width, green_threshold = CHECKED_PARAMETERS[0]
+    tiled_amount, _ = TiledCluster(orig_img=ArrayImage(orig_img), inner_epi=inner_epidermis, pixel_width=pixel_width,
+                                   green_threshold=green_threshold, tile_size=tile_size).get_cluster_amount()
+    check(tiled_amount == cluster_amounts[0], "tiled cluster differs")
+
+    if size <= legacy_max_size:
+        check(legacy_run_walker(img_canny) == annotation_edges, "former walker differs")
+        check(legacy_cluster_amount(orig_img, inner_epidermis, pixel_width, green_threshold) == cluster_amounts[0],
+              "former cluster differs")
+
+    digest = hashlib.sha256()
+    for edge in annotation_edges:
+        digest.update(np.asarray(edge, dtype=np.int64).tobytes())
+    digest.update(np.asarray(cluster_amounts, dtype=np.int64).tobytes())
+    return dict(size=size, phase=phase, seconds={name: round(value, 4) for name, value in seconds.items()},
+                digest=digest.hexdigest())
+
+
+def compare_with_baseline(records, baseline, max_slowdown) -> list:
+    """ Compares the outputs and timings with the records of an earlier run.
+
+    Args:
+        records (list(dict)): Records of `check_pair`
+        baseline (list(dict)): Records of an earlier run
+        max_slowdown (float): Allowed factor between the current and the baseline time of a step
+
+    Returns:
+        failures (list(str)): Descriptions of changed outputs and slowdowns
+    """
+    failures = []
+    baseline_records = {(record["size"], record["phase"]): record for record in baseline}
+    for record in records:
+        baseline_record = baseline_records.get((record["size"], record["phase"]))
+        if baseline_record is None:
+            continue
+        name = "size={} phase={}".format(record["size"], record["phase"])
+        if record["digest"] != baseline_record["digest"]:
+            failures.append("{}: outputs differ from the baseline".format(name))
+        for step, seconds in record["seconds"].items():
+            baseline_seconds = baseline_record["seconds"].get(step)
+            # very short steps are too noisy to compare
+            if baseline_seconds and seconds > 0.01 and seconds > max_slowdown * baseline_seconds:
+                failures.append("{}: {} took {:.3f}s, baseline {:.3f}s".format(name, step, seconds, baseline_seconds))
+    return failures
+
+
+def main():
+    """ Runs the correctness and speed regression suite for Walker and Cluster on synthetic pairs. """
+    parser = argparse.ArgumentParser(description="Correctness and speed regression suite for Walker and Cluster.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000], help="Image sizes in pixels.")
+    parser.add_argument("--phases", type=int, default=3, help="Number of band shapes per size.")
+    parser.add_argument("--legacy-max-size", type=int, default=1000,
+                        help="Also compare with the former (quadratic) implementations up to this size.")
+    parser.add_argument("--tile-size", type=int, default=1024, help="Tile size of the tiled implementations.")
+    parser.add_argument("--output", default=None, help="Write the records (timings and output digests) as JSON.")
+    parser.add_argument("--baseline", default=None,
+                        help="Records of an earlier run; changed outputs and slowdowns are failures.")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Allowed factor between the current and the baseline time of a step.")
+    args = parser.parse_args()
+
+    records = []
+    failures = []
+    for size in args.sizes:
+        for i in range(args.phases):
+            phase = round(i * 0.7, 2)
+            try:
+                record = check_pair(size, phase=phase, seed=i, legacy_max_size=args.legacy_max_size,
+                                    tile_size=args.tile_size)
+            except RegressionError as e:
+                failures.append("size={} phase={}: {}".format(size, phase, e))
+                print("size={:6d}  phase={:4.2f}  FAILED: {}".format(size, phase, e))
+                continue
+            records.append(record)
+            print("size={:6d}  phase={:4.2f}  ok  ".format(size, phase)
+                  + "  ".join("{}={:.1f}ms".format(step, seconds * 1000)
+                              for step, seconds in record["seconds"].items()))
+
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            failures.extend(compare_with_baseline(records, json.load(baseline_file), args.max_slowdown))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(records, output_file, indent=2)
+
+    for failure in failures:
+        print("FAILED " + failure)
+    print("{} pairs checked, {} failures".format(len(args.sizes) * args.phases, len(failures)))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import os
+import cv2
+import numpy as np
+
+
+# green value of the planted clusters and the highest green value of the background; with green thresholds in
+# [BACKGROUND_GREEN, CLUSTER_GREEN) only the planted clusters are counted
+CLUSTER_GREEN = 240
+BACKGROUND_GREEN = 180
+
+# half length of a planted cluster (a horizontal run of pixels centered on the inner edge) and the rows between two
+# clusters; windows of at least CLUSTER_HALF_LENGTH + 2 pixels cover every cluster
+CLUSTER_HALF_LENGTH = 4
+CLUSTER_SPACING = 12
+
+
+def band_edges(size, phase=0.0) -> tuple:
+    """ Returns the left and right edge of the curved annotation band per image row.
+
+    Args:
+        size (int): Height and width of the image
+        phase (float): Phase of the curve, varies the shape between subjects
+
+    Returns:
+        left_x (1d array): x coordinate of the first band pixel per row
+        right_x (1d array): x coordinate of the last band pixel per row
+    """
+    # straight at the top and bottom, so both edges reach the lowest row the walker starts from
+    rows = np.clip(np.arange(size), size // 20, size - 1 - size // 20)
+    center = size / 2 + size / 6 * np.sin(rows / size * 3 * np.pi + phase)
+    return np.ceil(center - size / 10).astype(int), np.floor(center + size / 10).astype(int)
+
+
+def synthetic_pair(size, phase=0.0, seed=0) -> tuple:
+    """ Creates an annotation with a curved band from the bottom to the top and an original image with green clusters
+        planted on the inner edge of the band.
+
+    The walker traces the left edge first (its lowest pixel is left of the right edge's); like in
+    `run_annotation.get_inner_epidermis`, the inner epidermis is the right edge if the left edge ends right of where
+    it starts, else the left edge.
+
+    Args:
+        size (int): Height and width of the images
+        phase (float): Phase of the curve
+        seed (int): Random seed of the background
+
+    Returns:
+        annotation_img (2d array): Band in white on black
+        orig_img (3d array): Noisy original image (BGR) whose green values only exceed BACKGROUND_GREEN in clusters
+        truth (dict): "left_x" and "right_x" (edges per row, see `band_edges`), "inner" ("left" or "right"),
+                      "inner_x" (inner edge per row) and "cluster_rows" (row of every planted cluster)
+    """
+    left_x, right_x = band_edges(size, phase)
+    # built in place as uint8, so 16k images fit into memory
+    columns = np.arange(size)
+    band = columns >= left_x[:, None]
+    band &= columns <= right_x[:, None]
+    annotation_img = band.view(np.uint8)
+    annotation_img *= 255
+
+    rng = np.random.default_rng(seed)
+    orig_img = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    orig_img[:, :, 1] = rng.integers(0, BACKGROUND_GREEN + 1, (size, size), dtype=np.uint8)
+
+    inner = "right" if left_x[-1] < left_x[0] else "left"
+    inner_x = right_x if inner == "right" else left_x
+    # no clusters in the lowest and highest rows, where the walker starts and leaves the image
+    cluster_rows = np.arange(CLUSTER_SPACING, size - CLUSTER_SPACING, CLUSTER_SPACING)
+    for y in cluster_rows:
+        orig_img[y, inner_x[y] - CLUSTER_HALF_LENGTH:inner_x[y] + CLUSTER_HALF_LENGTH + 1, 1] = CLUSTER_GREEN
+
+    truth = dict(left_x=left_x, right_x=right_x, inner=inner, inner_x=inner_x, cluster_rows=cluster_rows)
+    return annotation_img, orig_img, truth
+
+
+def write_pairs(img_dir, size, subjects) -> dict:
+    """ Writes synthetic image pairs as PNG files named like the real data ("<subject>_Annotation.png" and
+        "<subject>_HE.png").
+
+    Args:
+        img_dir (str): Output directory
+        size (int): Height and width of the images
+        subjects (int): Number of pairs
+
+    Returns:
+        truths (dict): Truth of `synthetic_pair` per subject
+    """
+    truths = dict()
+    for subject in range(subjects):
+        annotation_img, orig_img, truth = synthetic_pair(size, phase=subject * 0.7, seed=subject)
+        cv2.imwrite(os.path.join(img_dir, "{}_Annotation.png".format(subject)), annotation_img)
+        cv2.imwrite(os.path.join(img_dir, "{}_HE.png".format(subject)), orig_img)
+        truths[str(subject)] = truth
+    return truths
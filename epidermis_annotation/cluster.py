@@ -9,7 +9,7 @@ class Cluster:
 
         Args:
             orig_img (3d array): Original image (rgb)
-            inner_epi (list): Coordinates of inner epidermis edge
+            inner_epi (list or 2d array): [y, x] coordinates of inner epidermis edge
             pixel_width (int): User defined pixel width left and right to inner epidermis edge for cluster window
             green_threshold (int): User defined value for green value threshold concerning clustering
         """
@@ -18,56 +18,69 @@ class Cluster:
         self.pixel_width = pixel_width
         self.green_threshold = green_threshold
 
-    def get_cluster_amount(self) -> tuple(int, list(list(tuple))):
+    def get_cluster_amount(self) -> tuple:
         """ Returns cluster amount after creating cluster window and searching for clusters.
 
         Returns:
              cluster_amount (int): Amount of clusters in window
-             inner_epi_windows_coordinates (list(list(tuples)): Contains coordinates of window; used for visualization
+             window_centers (2d array): [y, x] edge coordinates of the windows, shape (n, 2); every window covers
+                                        row y from x - pixel_width to x + pixel_width; used for visualization
         """
-        inner_epi_windows, inner_epi_windows_coordinates = self._append_coordinates()
+        inner_epi_windows, window_centers = self._append_coordinates()
         cluster_amount = self._find_clusters(inner_epi_windows=inner_epi_windows)
-        return cluster_amount, inner_epi_windows_coordinates
+        return cluster_amount, window_centers
 
-    def _append_coordinates(self) -> tuple(list, list(list(tuple))):
-        """ Append edge with pixel left and right to coordinates; width is defined by user.
+    def _append_coordinates(self) -> tuple:
+        """ Gathers the window of pixel_width pixels left and right of every edge coordinate in one indexing operation.
 
         Returns:
-            inner_epi_green_windows (list): Thresholded green values in window used for clustering
-            inner_epi_windows_coordinates (list(list(tuples)): Contains coordinates of window; used for visualization
+            inner_epi_green_windows (2d array): Thresholded green values in window used for clustering, one row per
+                                                window; values not above green_threshold are 0
+            window_centers (2d array): [y, x] edge coordinates of the windows, shape (n, 2)
         """
-        inner_epi_green_windows = []
-        inner_epi_windows_coordinates = []
-        for coordinate in self.inner_epi:
-            green_channel_window = []
-            window_coordinates = []
-            x = coordinate[1]
-            y = coordinate[0]
-
-            # handles border; continues if pixel_width overshoots border
-            if (x - self.pixel_width) < 0 or (x + self.pixel_width + 1) > (self.orig_img.shape[1] - 1):
-                continue
-
-            for i in range(x - self.pixel_width, x + self.pixel_width + 1):
-                img_ = self.orig_img[:, :, 1]
-                green_channel = img_[y][i]
-                if green_channel > self.green_threshold:
-                    green_channel_window.append(green_channel)
-                else:
-                    green_channel_window.append(0)
-                window_coordinates.append([y, i])
-
-            inner_epi_green_windows.append(green_channel_window)
-            inner_epi_windows_coordinates.append(window_coordinates)
-        return inner_epi_green_windows, inner_epi_windows_coordinates
+        window_centers = self._get_window_centers()
+        inner_epi_green_windows = self._get_green_windows(green_channel=self.orig_img[:, :, 1],
+                                                          window_centers=window_centers)
+        return inner_epi_green_windows, window_centers
+
+    def _get_window_centers(self):
+        """ Returns the inner epidermis coordinates whose window fits into the image.
+
+        Returns:
+            window_centers (2d array): [y, x] edge coordinates of the windows, shape (n, 2)
+        """
+        window_centers = np.asarray(self.inner_epi, dtype=np.intp).reshape(-1, 2)
+
+        # handles border; drops windows that overshoot the border
+        x = window_centers[:, 1]
+        inside = (x - self.pixel_width >= 0) & (x + self.pixel_width + 1 <= self.orig_img.shape[1] - 1)
+        return window_centers[inside]
+
+    def _get_green_windows(self, green_channel, window_centers, origin=(0, 0)):
+        """ Gathers all windows at once (row y, columns x - pixel_width ... x + pixel_width) and thresholds them.
+
+        Args:
+            green_channel (2d array): Green channel of the original image or of a region of it
+            window_centers (2d array): [y, x] edge coordinates of the windows, shape (n, 2)
+            origin (tuple): [y, x] image coordinate of the first pixel of green_channel
+
+        Returns:
+            inner_epi_green_windows (2d array): Thresholded green values, one row per window
+        """
+        offsets = np.arange(-self.pixel_width, self.pixel_width + 1) - origin[1]
+        green_windows = green_channel[window_centers[:, :1] - origin[0], window_centers[:, 1:] + offsets]
+        return np.where(green_windows > self.green_threshold, green_windows, 0)
 
     def _find_clusters(self, inner_epi_windows) -> int:
         """ Finds clusters using skimage label function.
 
+        Args:
+            inner_epi_windows (2d array): Thresholded green values, one row per window
+
         Returns:
             counts (int): Amount of clusters found in window
         """
-        inner_epi_windows_ = np.array(inner_epi_windows)
-        labeled_array, counts = label(inner_epi_windows_, return_num=True)
+        if inner_epi_windows.size == 0:
+            return 0
+        labeled_array, counts = label(inner_epi_windows, return_num=True)
         return counts
-
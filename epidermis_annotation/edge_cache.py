@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+import zipfile
+import tempfile
+import numpy as np
+from walker import CANNY_THRESHOLDS, MAX_STEPS
+
+
+# increase when the edge tracing changes its results, so older cache entries are not used anymore
+EDGE_CACHE_VERSION = 1
+
+# bytes read at once when hashing an annotation file
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+class EdgeCache:
+    """ On-disk cache of the annotation edges traced by `Walker`, one compressed .npz file per annotation.
+
+    Entries are keyed by the content hash of the annotation file and the canny and walker parameters, so renamed
+    annotations are still found and changed annotations or parameters are traced again.
+
+    Attributes:
+        cache_dir (str): Directory of the cache files
+    """
+    def __init__(self, cache_dir):
+        """ Constructor. """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(annot_path) -> str:
+        """ Returns the cache key of an annotation file.
+
+        Args:
+            annot_path (str): Path of the annotation
+
+        Returns:
+            key (str): Hex digest of the file content and the edge tracing parameters
+        """
+        digest = hashlib.sha256()
+        with open(annot_path, "rb") as annot_file:
+            for chunk in iter(lambda: annot_file.read(_HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        params = dict(version=EDGE_CACHE_VERSION, canny_thresholds=CANNY_THRESHOLDS, max_steps=MAX_STEPS)
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """ Returns the cached edges of a key.
+
+        Args:
+            key (str): Cache key, see `key`
+
+        Returns:
+            annotation_edges (list(2d array)): [y, x] coordinates per edge, shape (n, 2); None if not cached
+        """
+        try:
+            with np.load(self._path(key)) as entry:
+                coordinates = entry["coordinates"]
+                lengths = entry["lengths"]
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # not cached or a broken file, trace again
+            return None
+        if len(lengths) == 0:
+            return []
+        return np.split(coordinates.astype(np.intp), np.cumsum(lengths)[:-1])
+
+    def put(self, key, annotation_edges):
+        """ Stores the edges of a key; the file is written under a temporary name and renamed, so parallel workers
+            never read half written entries.
+
+        Args:
+            key (str): Cache key, see `key`
+            annotation_edges (list(list(list))): [y, x] coordinates per edge
+        """
+        lengths = np.array([len(edge) for edge in annotation_edges], dtype=np.int64)
+        coordinates = np.concatenate([np.asarray(edge, dtype=np.int32).reshape(-1, 2) for edge in annotation_edges]
+                                     + [np.empty((0, 2), dtype=np.int32)])
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix=".npz", dir=self.cache_dir)
+        try:
+            with os.fdopen(file_descriptor, "wb") as cache_file:
+                np.savez_compressed(cache_file, coordinates=coordinates, lengths=lengths)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def _path(self, key) -> str:
+        """ Returns the path of the cache file of a key. """
+        return os.path.join(self.cache_dir, key + ".npz")
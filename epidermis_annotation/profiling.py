@@ -0,0 +1,102 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def max_rss_mb():
+    """ Returns the peak resident memory of the process so far in MB, None where it is not available (Windows).
+
+    Returns:
+        max_rss_mb (float): Peak resident memory in MB or None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux and the other Unixes
+    return round(max_rss / (2 ** 20 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageProfiler:
+    """ Measures the duration of the stages of one image pair and optionally the peak memory allocated in them.
+
+    A disabled profiler only runs the stages, so the pipeline calls it unconditionally.
+
+    Attributes:
+        enabled (bool): Record the stages
+        trace_memory (bool): Also record the peak memory allocated during every stage with tracemalloc (NumPy arrays
+                             and Python objects, not the internal buffers of OpenCV); slows down pure Python stages
+        stages (dict): Maps stage names to {"seconds": float, "peak_mb": float}, in the order the stages ran
+    """
+    def __init__(self, enabled=False, trace_memory=False):
+        """ Constructor. """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stages = dict()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """ Context manager that records the duration (and peak memory) of its block as a stage.
+
+        Args:
+            name (str): Stage name; the durations of repeated stages are added up
+        """
+        if not self.enabled:
+            yield
+            return
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, dict(seconds=0.0))
+            stage["seconds"] += time.perf_counter() - start
+            if self.trace_memory:
+                peak_mb = (tracemalloc.get_traced_memory()[1] - start_memory) / 2 ** 20
+                stage["peak_mb"] = max(stage.get("peak_mb", 0.0), peak_mb)
+
+    def report(self) -> dict:
+        """ Returns the recorded stages of the image pair.
+
+        Returns:
+            report (dict): "stages" (seconds and, with trace_memory, peak_mb per stage) and "max_rss_mb" (peak
+                           resident memory of the process so far, None if not available, see `max_rss_mb`)
+        """
+        stages = {name: {key: round(value, 4) for key, value in stage.items()} for name, stage in self.stages.items()}
+        return dict(stages=stages, max_rss_mb=max_rss_mb())
+
+
+def aggregate_reports(reports) -> dict:
+    """ Sums up the stage reports of several image pairs.
+
+    Args:
+        reports (list(dict)): Reports of `StageProfiler.report`
+
+    Returns:
+        aggregate (dict): "images", "seconds" (sum over all stages), "max_rss_mb" (None if not available) and per
+                          stage the total, mean and maximal seconds, the share of the total time and the maximal peak_mb
+    """
+    stages = dict()
+    for report in reports:
+        for name, stage in report["stages"].items():
+            stages.setdefault(name, []).append(stage)
+    total_seconds = sum(stage["seconds"] for report in reports for stage in report["stages"].values())
+
+    aggregate = dict(images=len(reports), seconds=round(total_seconds, 3),
+                     max_rss_mb=max((report["max_rss_mb"] for report in reports if report["max_rss_mb"] is not None),
+                                    default=None), stages=dict())
+    for name, measurements in stages.items():
+        seconds = [stage["seconds"] for stage in measurements]
+        aggregate["stages"][name] = dict(
+            total_seconds=round(sum(seconds), 4), mean_seconds=round(sum(seconds) / len(seconds), 4),
+            max_seconds=round(max(seconds), 4), share=round(sum(seconds) / total_seconds, 3) if total_seconds else 0.0)
+        peaks = [stage["peak_mb"] for stage in measurements if "peak_mb" in stage]
+        if peaks:
+            aggregate["stages"][name]["max_peak_mb"] = round(max(peaks), 2)
+    return aggregate
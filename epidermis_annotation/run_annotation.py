@@ -1,73 +1,406 @@
 import os
+import csv
+import json
 import cv2
+import time
+import argparse
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from walker import Walker
 from cluster import Cluster
+from tiled import TiledWalker, TiledCluster, open_image, render_preview, window_mask
+from edge_cache import EdgeCache
+from profiling import StageProfiler, aggregate_reports
 
 
-def run():
-    """ Run pathology image segmentation finding clusters and length of inner epidermis. """
+PIXEL_WIDTH = 50
+GREEN_THRESHOLD = 200
 
+# height and width of each of the four images of a visualization
+PANEL_SIZE = 512
+
+# file formats of the visualizations; "none" does not write them
+IMAGE_FORMATS = ("jpg", "png", "none")
+JPEG_QUALITY = 95
+
+# file name extensions of the images in the input directory
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".npy")
+
+# columns of the results table, one row per subject
+RESULT_FIELDS = ["subject", "annotation_file", "original_file", "inner_epidermis_length", "cluster_amount",
+                 "seconds", "error"]
+
+
+def run(img_dir, output_dir=".", csv_path=None, workers=1, show=False, visualize=True,
+        pixel_width=PIXEL_WIDTH, green_threshold=GREEN_THRESHOLD, tile_size=None, image_format="jpg",
+        jpeg_quality=JPEG_QUALITY, edge_cache_dir=None, profile_path=None, trace_memory=False) -> list:
+    """ Run pathology image segmentation finding clusters and length of inner epidermis.
+
+    Image pairs are processed in parallel by a pool of `workers` processes; the visualizations are written by a
+    background thread while the next pairs are processed. With `show`, every visualization is displayed and the
+    pairs are processed one after another.
+
+    Args:
+        img_dir (str): Directory with the original images and annotations
+        output_dir (str): Directory for the visualizations
+        csv_path (str): Path of the results table (one row per subject); None to not write one
+        workers (int): Number of processes
+        show (bool): Display every visualization and wait for a key press
+        visualize (bool): Create and save the visualizations
+        pixel_width (int): Pixel width left and right to inner epidermis edge for cluster window
+        green_threshold (int): Green value threshold concerning clustering
+        tile_size (int): Process the images tile by tile (see `tiled`) with tiles of this size; None to read every
+                         image completely
+        image_format (str): File format of the visualizations, one of IMAGE_FORMATS; "none" only creates them for
+                            `show`
+        jpeg_quality (int): JPEG quality (0-100) of the visualizations
+        edge_cache_dir (str): Directory of the edge cache (see `EdgeCache`), so annotations that were traced before
+                              are not traced again; None to always trace
+        profile_path (str): Path of a JSON report with the duration of every stage per image pair and in total (see
+                            `StageProfiler`); None to not profile
+        trace_memory (bool): Add the peak memory allocated per stage to the report (slows down the walker)
+
+    Returns:
+        results (list(dict)): One row per subject with the fields in RESULT_FIELDS, ordered by subject; subjects
+                              without a unique image pair only have an "error"
+    """
     # read all images in defined image directory
-    img_dir = "put_dir_here"
-    images_paths = os.listdir(img_dir)
-    file_pairs = _get_file_pairs(images_paths=images_paths)
+    file_pairs, problems = get_file_pairs(images_paths=scan_image_files(img_dir))
+    for subject, problem in sorted(problems.items()):
+        print("Skipping subject {}: {}".format(subject, problem))
+    os.makedirs(output_dir, exist_ok=True)
+    write_images = visualize and image_format != "none"
+    tasks = [dict(img_dir=img_dir, annot_file=file_pair[0], orig_file=file_pair[1], pixel_width=pixel_width,
+                  green_threshold=green_threshold, visualize=write_images or show, tile_size=tile_size,
+                  edge_cache_dir=edge_cache_dir, profile=profile_path is not None, trace_memory=trace_memory)
+             for file_pair in file_pairs]
+
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as image_writer:
+        if show or workers <= 1:
+            finished = (process_pair(**task) for task in tasks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+            finished = (future.result() for future in as_completed([executor.submit(process_pair, **task)
+                                                                   for task in tasks]))
+        try:
+            # get clusters and length of inner epidermis for every image pair (original image, annotation)
+            for result, img_visualized in finished:
+                results.append(result)
+                if result["error"]:
+                    print("Failed to process {}: {}".format(result["annotation_file"], result["error"]))
+                else:
+                    print("{} ({}/{}): {} clusters, inner epidermis length {} ({:.1f}s)".format(
+                        result["subject"], len(results), len(tasks), result["cluster_amount"],
+                        result["inner_epidermis_length"], result["seconds"]))
+                if img_visualized is None:
+                    continue
+                if show:
+                    _show(img_visualized)
+                if write_images:
+                    image_writer.submit(_write_image, os.path.join(
+                        output_dir, '{}.{}'.format(result["original_file"], image_format)), img_visualized,
+                        jpeg_quality)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    # subjects without a unique image pair are listed with their problem
+    results.extend(dict(dict.fromkeys(RESULT_FIELDS, None), subject=subject, error=problem)
+                   for subject, problem in problems.items())
+    results.sort(key=lambda row: row["subject"])
+    if csv_path is not None:
+        _write_results(results=results, csv_path=csv_path)
+    if profile_path is not None:
+        _write_profile(results=results, profile_path=profile_path)
+    return results
+
+
+def init_worker():
+    """ Limits OpenCV to one thread per process, the pool already uses every core. """
+    cv2.setNumThreads(1)
+
+
+def process_pair(img_dir, annot_file, orig_file, pixel_width, green_threshold, visualize, tile_size=None,
+                 edge_cache_dir=None, profile=False, trace_memory=False) -> tuple:
+    """ Finds clusters and length of inner epidermis for one image pair; runs in a worker process.
 
-    # get clusters and length of inner epidermis for every image pair (original image, annotation)
-    for file_pair in file_pairs:
-        annot_file = file_pair[0]
-        orig_file = file_pair[1]
+    Args:
+        img_dir (str): Directory of the images
+        annot_file (str): File name of the annotation
+        orig_file (str): File name of the original image
+        pixel_width (int): Pixel width left and right to inner epidermis edge for cluster window
+        green_threshold (int): Green value threshold concerning clustering
+        visualize (bool): Create the visualization
+        tile_size (int): Process the images tile by tile with tiles of this size; None to read them completely
+        edge_cache_dir (str): Directory of the edge cache; None to always trace the edges
+        profile (bool): Record the duration of every stage in result["profile"]
+        trace_memory (bool): Also record the peak memory allocated per stage
 
-        # define src file
-        annot = os.path.join(img_dir, annot_file)
-        orig_img = os.path.join(img_dir, orig_file)
+    Returns:
+        result (dict): Row of the results table, see RESULT_FIELDS; "error" is set if the pair failed
+        img_visualized (3d array): Visualization, None if not requested or failed
+    """
+    start = time.perf_counter()
+    result = dict(subject=annot_file.split("_")[0], annotation_file=annot_file, original_file=orig_file,
+                  inner_epidermis_length=None, cluster_amount=None, seconds=None, error="")
+    profiler = StageProfiler(enabled=profile, trace_memory=trace_memory)
+    try:
+        annot_path = os.path.join(img_dir, annot_file)
+        orig_path = os.path.join(img_dir, orig_file)
+        edge_cache = EdgeCache(edge_cache_dir) if edge_cache_dir is not None else None
+        annotation_edges = None
+        if edge_cache is not None:
+            with profiler.stage("edge_cache"):
+                cache_key = edge_cache.key(annot_path)
+                annotation_edges = edge_cache.get(cache_key)
+        cache_hit = annotation_edges is not None
+
+        if tile_size is not None:
+            annotation_edges, inner_epidermis_length, cluster_amount, img_visualized = _process_pair_tiled(
+                annot_path=annot_path, orig_path=orig_path, pixel_width=pixel_width,
+                green_threshold=green_threshold, visualize=visualize, tile_size=tile_size,
+                annotation_edges=annotation_edges, profiler=profiler)
+        else:
+            annotation_edges, inner_epidermis_length, cluster_amount, img_visualized = _process_pair_in_memory(
+                annot_path=annot_path, orig_path=orig_path, pixel_width=pixel_width,
+                green_threshold=green_threshold, visualize=visualize, annotation_edges=annotation_edges,
+                profiler=profiler)
+
+        if edge_cache is not None and not cache_hit:
+            with profiler.stage("edge_cache"):
+                edge_cache.put(cache_key, annotation_edges)
+    except Exception as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+        img_visualized = None
+    else:
+        result.update(inner_epidermis_length=inner_epidermis_length, cluster_amount=cluster_amount,
+                      seconds=round(time.perf_counter() - start, 3))
+    if profile:
+        result["profile"] = profiler.report()
+    return result, img_visualized
 
-        # read images
-        annot_img = cv2.imread(annot, cv2.IMREAD_GRAYSCALE)
-        orig_img = cv2.imread(orig_img, cv2.IMREAD_COLOR)
 
-        # get annotation edges coordinates with Walker class
-        walker = Walker(annotation_img=annot_img)
-        annotation_edges, img_canny = walker.get_annotation_edges()
+def _process_pair_in_memory(annot_path, orig_path, pixel_width, green_threshold, visualize, annotation_edges=None,
+                            profiler=None) -> tuple:
+    """ Finds clusters and length of inner epidermis for one image pair that is read completely.
 
-        # define which edge is inner epidermis
-        inner_epidermis = _get_inner_epidermis(annotation_edges=annotation_edges)
-        inner_epidermis_length = len(inner_epidermis)
+    Args:
+        annot_path (str): Path of the annotation
+        orig_path (str): Path of the original image
+        pixel_width (int): Pixel width left and right to inner epidermis edge for cluster window
+        green_threshold (int): Green value threshold concerning clustering
+        visualize (bool): Create the visualization
+        annotation_edges (list): Edges from the edge cache; None to trace them
+        profiler (StageProfiler): Records the stages; None to not record them
 
-        # find clusters and get count
-        cluster = Cluster(orig_img=orig_img, inner_epi=inner_epidermis, pixel_width=50, green_threshold=200)
-        cluster_amount, inner_epi_windows_coordinates = cluster.get_cluster_amount()
+    Returns:
+        annotation_edges (list): [y, x] coordinates of the annotation edges
+        inner_epidermis_length (int): Pixel amount of inner epidermis edge
+        cluster_amount (int): Amount of cluster in edge window
+        img_visualized (3d array): Visualization, None if not requested
+    """
+    profiler = profiler if profiler is not None else StageProfiler()
+
+    # read images; the annotation is not needed if its edges are cached and there is no visualization
+    annot_img = None
+    if annotation_edges is None or visualize:
+        with profiler.stage("read_annotation"):
+            annot_img = read_image(annot_path, color=False)
+        if annot_img is None:
+            raise ValueError("image could not be read")
+    with profiler.stage("read_original"):
+        orig_img = read_image(orig_path, color=True)
+    if orig_img is None:
+        raise ValueError("image could not be read")
+
+    # get annotation edges coordinates with Walker class (the steps of `Walker.get_annotation_edges`)
+    walker = Walker(annotation_img=annot_img)
+    img_canny = None
+    if annotation_edges is None or visualize:
+        with profiler.stage("canny"):
+            img_canny = walker._get_img_canny()
+    if annotation_edges is None:
+        with profiler.stage("trace"):
+            annotation_edges = walker._run_walker(img_canny=img_canny)
+
+    # define which edge is inner epidermis
+    inner_epidermis = get_inner_epidermis(annotation_edges=annotation_edges)
+    inner_epidermis_length = len(inner_epidermis)
+
+    # find clusters and get count (the steps of `Cluster.get_cluster_amount`)
+    cluster = Cluster(orig_img=orig_img, inner_epi=inner_epidermis, pixel_width=pixel_width,
+                      green_threshold=green_threshold)
+    with profiler.stage("windows"):
+        inner_epi_windows, window_centers = cluster._append_coordinates()
+    with profiler.stage("label"):
+        cluster_amount = cluster._find_clusters(inner_epi_windows=inner_epi_windows)
+
+    img_visualized = None
+    if visualize:
+        with profiler.stage("visualize"):
+            img_visualized = _visualize(orig_img=orig_img, annot_img=annot_img, img_canny=img_canny,
+                                        window_centers=window_centers, pixel_width=pixel_width,
+                                        inner_epidermis_length=inner_epidermis_length,
+                                        cluster_amount=cluster_amount)
+    return annotation_edges, inner_epidermis_length, cluster_amount, img_visualized
+
+
+def read_image(path, color):
+    """ Reads an image completely; .npy files (in OpenCV's BGR order) are loaded with NumPy.
+
+    Args:
+        path (str): Path of the image
+        color (bool): Color image (original) instead of grayscale (annotation)
 
-        _visualize(orig_img=orig_img, annot_img=annot_img, img_canny=img_canny,
-                   inner_epi_windows_coordinates=inner_epi_windows_coordinates,
-                   inner_epidermis_length=inner_epidermis_length, cluster_amount=cluster_amount, name=orig_file)
+    Returns:
+        img (2d or 3d array): Image, None if it could not be read
+    """
+    if path.lower().endswith(".npy"):
+        return np.load(path)
+    return cv2.imread(path, cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE)
 
 
-def _get_file_pairs(images_paths) -> list(tuple):
-    """ Read images in directory and sort files to pairs (original image, annotation).
+def _process_pair_tiled(annot_path, orig_path, pixel_width, green_threshold, visualize, tile_size,
+                        annotation_edges=None, profiler=None) -> tuple:
+    """ Finds clusters and length of inner epidermis for one image pair without reading the images completely.
+
+    Memory-mapped images (.npy, uncompressed TIFF) are only read tile by tile: the canny filter runs on the tiles the
+    walker reaches, the clusters are searched in chunks of windows and the visualization is downsampled per tile.
 
     Args:
-        images_paths (list): Path to images
+        annot_path (str): Path of the annotation
+        orig_path (str): Path of the original image
+        pixel_width (int): Pixel width left and right to inner epidermis edge for cluster window
+        green_threshold (int): Green value threshold concerning clustering
+        visualize (bool): Create the visualization
+        tile_size (int): Height and width of the tiles
+        annotation_edges (list): Edges from the edge cache; None to trace them
+        profiler (StageProfiler): Records the stages; None to not record them
 
     Returns:
-        file_pairs (list(tuple)): Each entry contains the corresponding file path to subject's
-                                  original image and annotation
+        annotation_edges (list): [y, x] coordinates of the annotation edges
+        inner_epidermis_length (int): Pixel amount of inner epidermis edge
+        cluster_amount (int): Amount of cluster in edge window
+        img_visualized (3d array): Visualization, None if not requested
     """
-    file_pairs = list()
+    profiler = profiler if profiler is not None else StageProfiler()
+    annot_img = open_image(annot_path, color=False)
+    orig_img = open_image(orig_path, color=True)
+
+    # the canny filter is computed tile by tile while tracing, the images are read while tracing and clustering
+    if annotation_edges is None:
+        walker = TiledWalker(annotation_img=annot_img, tile_size=tile_size)
+        with profiler.stage("trace"):
+            annotation_edges, _ = walker.get_annotation_edges()
+    inner_epidermis = get_inner_epidermis(annotation_edges=annotation_edges)
+
+    cluster = TiledCluster(orig_img=orig_img, inner_epi=inner_epidermis, pixel_width=pixel_width,
+                           green_threshold=green_threshold, tile_size=tile_size)
+    with profiler.stage("clusters"):
+        cluster_amount, window_centers = cluster.get_cluster_amount()
+
+    img_visualized = None
+    if visualize:
+        with profiler.stage("visualize"):
+            img_visualized = render_preview(orig_img=orig_img, annot_img=annot_img, window_centers=window_centers,
+                                            pixel_width=pixel_width, size=2 * PANEL_SIZE, tile_size=tile_size)
+            _add_title(img_visualized, inner_epidermis_length=len(inner_epidermis), cluster_amount=cluster_amount)
+    return annotation_edges, len(inner_epidermis), cluster_amount, img_visualized
+
+
+def _write_image(path, img_visualized, jpeg_quality):
+    """ Encodes and writes a visualization, the format is given by the file name extension.
+
+    Args:
+        path (str): Path of the image file
+        img_visualized (3d array): Visualization
+        jpeg_quality (int): JPEG quality (0-100), ignored for other formats
+    """
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality] if path.endswith(".jpg") else []
+    cv2.imwrite(path, img_visualized, params)
+
+
+def _write_results(results, csv_path):
+    """ Writes the results table as CSV.
+
+    Args:
+        results (list(dict)): Rows with the fields in RESULT_FIELDS
+        csv_path (str): Path of the CSV file
+    """
+    with open(csv_path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def _write_profile(results, profile_path):
+    """ Writes the stage report of every profiled image pair and their aggregate as JSON.
+
+    Args:
+        results (list(dict)): Rows of the results table, profiled pairs have a "profile"
+        profile_path (str): Path of the JSON file
+    """
+    images = {row["subject"]: row["profile"] for row in results if "profile" in row}
+    with open(profile_path, "w") as profile_file:
+        json.dump(dict(aggregate=aggregate_reports(list(images.values())), images=images), profile_file, indent=2)
+
+
+def scan_image_files(img_dir):
+    """ Lazily yields the names of the image files in a directory.
+
+    Args:
+        img_dir (str): Image directory
+
+    Yields:
+        file (str): File name of an image
+    """
+    with os.scandir(img_dir) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                yield entry.name
+
+
+def get_file_pairs(images_paths) -> tuple:
+    """ Sort image files to pairs (annotation, original image) by subject.
+
+    The subject is the part of the file name before the first "_"; annotations contain "Annotation" in their name.
+    Every file is looked at once and indexed by its subject, so pairing takes linear time.
+
+    Args:
+        images_paths (iterable(str)): File names of the images, e.g. from `scan_image_files`
+
+    Returns:
+        file_pairs (list(tuple)): (annotation, original image) file names per subject, in the order of the annotations
+        problems (dict): Maps subjects without a unique pair to a description (missing or ambiguous files)
+    """
+    annotations = {}
+    originals = {}
     for file in images_paths:
-        pair = list()
-        if "Annotation" in file:
-            subject_nr = file.split("_")[0]
-            pair.append(file)
-            for file in images_paths:
-                if subject_nr in file and not "Annotation" in file:
-                    pair.append(file)
-        if not len(pair) == 0:
-            file_pairs.append(pair)
-    return file_pairs
-
-
-def _get_inner_epidermis(annotation_edges) -> list:
+        subject = file.split("_")[0]
+        files = annotations if "Annotation" in file else originals
+        files.setdefault(subject, []).append(file)
+
+    file_pairs = list()
+    problems = dict()
+    for subject, annotation_files in annotations.items():
+        original_files = originals.get(subject, [])
+        if len(annotation_files) > 1:
+            problems[subject] = "ambiguous annotations: {}".format(", ".join(sorted(annotation_files)))
+        elif len(original_files) > 1:
+            problems[subject] = "ambiguous original images: {}".format(", ".join(sorted(original_files)))
+        elif not original_files:
+            problems[subject] = "missing original image for {}".format(annotation_files[0])
+        else:
+            file_pairs.append((annotation_files[0], original_files[0]))
+    for subject, original_files in originals.items():
+        if subject not in annotations:
+            problems[subject] = "missing annotation for {}".format(", ".join(sorted(original_files)))
+    return file_pairs, problems
+
+
+def get_inner_epidermis(annotation_edges) -> list:
     """ Returns inner epidermis (this is decided by start- and endpoint of edges in x-direction).
         If startpoint is smaller than endpoint, then the annotation has a curve to the right, meaning
         the second edge is the inner epidermis.
@@ -88,38 +421,48 @@ def _get_inner_epidermis(annotation_edges) -> list:
         return annotation_edges[0]
 
 
-def _visualize(orig_img, annot_img, img_canny, inner_epi_windows_coordinates,
-               inner_epidermis_length, cluster_amount, name):
-    """ Visualize data.
+def _visualize(orig_img, annot_img, img_canny, window_centers, pixel_width,
+               inner_epidermis_length, cluster_amount):
+    """ Visualize data in a 2x2 mosaic with a title.
 
     Args:
         orig_img (3d array): Original image (rgb)
         annot_img (2d array): Annotation (grayscale)
         img_canny (2d array): Canny edge filtered annotation image (grayscale)
-        inner_epi_windows_coordinates (list(list(tuples)): Contains coordinates of inner epidermis edge with a window-
-                                                           size of user defined pixels left and right to edge coordinate
+        window_centers (2d array): [y, x] coordinates of inner epidermis edge that have a window of pixel_width
+                                   pixels left and right to them
+        pixel_width (int): Pixel width of the windows left and right to the edge coordinate
+        inner_epidermis_length (int): Pixel amount of inner epidermis edge
         cluster_amount (int): Amount of cluster in edge window
-        name (str): Name of original image file for saving purposes
+
+    Returns:
+        img_resized (3d array): Visualization of 2 * PANEL_SIZE x 2 * PANEL_SIZE pixels
     """
-    # create filtered original image with edge window
-    height, width, channels = orig_img.shape
-    filtered_orig_img = np.zeros((height, width, channels), dtype=np.uint8)
-    for window in inner_epi_windows_coordinates:
-        for y, x in window:
-            filtered_orig_img[y][x][:] = orig_img[y][x][:]
+    # downscale every image to its panel first, then convert the grayscale panels to RGB
+    orig_panel, annot_panel, canny_panel = [cv2.resize(img, (PANEL_SIZE, PANEL_SIZE))
+                                            for img in (orig_img, annot_img, img_canny)]
+    annot_panel = cv2.cvtColor(annot_panel, cv2.COLOR_GRAY2BGR)
+    canny_panel = cv2.cvtColor(canny_panel, cv2.COLOR_GRAY2BGR)
+
+    # create filtered original image with edge window; the windows are drawn at panel scale like in tiled previews
+    mask = window_mask(window_centers, pixel_width, orig_img.shape[:2], PANEL_SIZE)
+    filtered_panel = orig_panel * mask[:, :, None]
 
-    # convert the grayscale images to RGB images
-    annot_img = cv2.cvtColor(annot_img, cv2.COLOR_GRAY2BGR)
-    img_canny = cv2.cvtColor(img_canny, cv2.COLOR_GRAY2BGR)
-    images = [orig_img, annot_img, img_canny, filtered_orig_img]
+    # concatenate the panels into a single image
+    img_resized = np.concatenate([np.concatenate([orig_panel, annot_panel], axis=0),
+                                  np.concatenate([canny_panel, filtered_panel], axis=0)], axis=1)
+    _add_title(img_resized, inner_epidermis_length=inner_epidermis_length, cluster_amount=cluster_amount)
+    return img_resized
 
-    # concatenate the images into a single large image
-    h_concat = np.concatenate(images[:2], axis=0)
-    result = np.concatenate([h_concat, np.concatenate(images[2:], axis=0)], axis=1)
 
-    # display the large image in a single window
-    img_resized = cv2.resize(result, (1024, 1024))
+def _add_title(img_resized, inner_epidermis_length, cluster_amount):
+    """ Adds the title with the results to a 1024x1024 visualization in place.
 
+    Args:
+        img_resized (3d array): Visualization
+        inner_epidermis_length (int): Pixel amount of inner epidermis edge
+        cluster_amount (int): Amount of cluster in edge window
+    """
     # define the title to be added to the image
     title = 'clusters: {}, pixel amount of inner epidermis edge: {}'.format(cluster_amount, inner_epidermis_length)
 
@@ -143,14 +486,63 @@ def _visualize(orig_img, annot_img, img_canny, inner_epi_windows_coordinates,
     # add the title to the image
     cv2.putText(img_resized, title, (text_x, text_y), font, font_scale, font_color, thickness)
 
-    # show image with user input
-    cv2.imshow("pathologie", img_resized)
+
+def _show(img_visualized):
+    """ Shows a visualization and waits for user input.
+
+    Args:
+        img_visualized (3d array): Visualization
+    """
+    cv2.imshow("pathologie", img_visualized)
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
-    # save file
-    cv2.imwrite('{}.jpg'.format(name), img_resized)
+
+def main():
+    """ Parses command line arguments and runs the annotation of a directory of image pairs. """
+    parser = argparse.ArgumentParser(description="Count clusters along the inner epidermis of pathology images.")
+    parser.add_argument("input_dir", help="Directory with the original images and their annotations.")
+    parser.add_argument("--output-dir", default=".", help="Directory for the visualizations and the results table.")
+    parser.add_argument("--csv", default="results.csv",
+                        help="File name of the results table in the output directory (default: results.csv).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of processes (default: number of cores).")
+    parser.add_argument("--show", action="store_true",
+                        help="Display every visualization and wait for a key press (processes one pair at a time).")
+    parser.add_argument("--no-visualization", action="store_true", help="Do not create visualizations.")
+    parser.add_argument("--image-format", choices=IMAGE_FORMATS, default="jpg",
+                        help="File format of the visualizations; none does not write them (default: jpg).")
+    parser.add_argument("--jpeg-quality", type=int, default=JPEG_QUALITY,
+                        help="JPEG quality of the visualizations (default: {}).".format(JPEG_QUALITY))
+    parser.add_argument("--pixel-width", type=int, default=PIXEL_WIDTH,
+                        help="Pixel width left and right to the inner epidermis edge for the cluster window.")
+    parser.add_argument("--green-threshold", type=int, default=GREEN_THRESHOLD,
+                        help="Green value threshold for clustering.")
+    parser.add_argument("--edge-cache", default=None,
+                        help="Directory of a cache of the traced annotation edges; reruns with other cluster "
+                             "parameters do not trace unchanged annotations again.")
+    parser.add_argument("--profile", default=None,
+                        help="Write the duration of every stage per image pair and in total to this JSON file in "
+                             "the output directory.")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Add the peak memory allocated per stage to the profile (slows down the walker).")
+    parser.add_argument("--tile-size", type=int, default=None,
+                        help="Process the images tile by tile with tiles of this size, so images larger than the "
+                             "memory can be processed (memory-mapped .npy or uncompressed TIFF files).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run(img_dir=args.input_dir, output_dir=args.output_dir,
+                  csv_path=os.path.join(args.output_dir, args.csv), workers=args.workers, show=args.show,
+                  visualize=not args.no_visualization, pixel_width=args.pixel_width,
+                  green_threshold=args.green_threshold, tile_size=args.tile_size, image_format=args.image_format,
+                  jpeg_quality=args.jpeg_quality, edge_cache_dir=args.edge_cache,
+                  profile_path=os.path.join(args.output_dir, args.profile) if args.profile else None,
+                  trace_memory=args.profile_memory)
+    failed = sum(1 for result in results if result["error"])
+    print("Processed {} subjects ({} failed or skipped) in {:.1f}s".format(
+        len(results), failed, time.perf_counter() - start))
 
 
 if __name__ == '__main__':
-    run()
+    main()
@@ -0,0 +1,163 @@
+import os
+import csv
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from skimage.measure import label
+from walker import Walker
+from edge_cache import EdgeCache
+from run_annotation import (PIXEL_WIDTH, GREEN_THRESHOLD, init_worker, scan_image_files, get_file_pairs,
+                            read_image, get_inner_epidermis)
+
+
+# columns of the sweep table, one row per subject and parameter combination
+SWEEP_FIELDS = ["subject", "pixel_width", "green_threshold", "inner_epidermis_length", "cluster_amount", "error"]
+
+
+def sweep_cluster_amounts(orig_img, inner_epi, pixel_widths, green_thresholds) -> np.ndarray:
+    """ Returns the cluster amount of `Cluster` for every combination of pixel width and green threshold.
+
+    The window band of the widest pixel width is gathered once; narrower windows are column slices of it. Clusters
+    are regions of equal green value, so thresholding never splits or merges them, it only removes the clusters whose
+    value is not above the threshold: the windows are labeled once per pixel width (at the lowest threshold) and the
+    amount for every threshold is the number of clusters with a higher value.
+
+    Args:
+        orig_img (3d array): Original image (rgb)
+        inner_epi (list or 2d array): [y, x] coordinates of inner epidermis edge
+        pixel_widths (list(int)): Pixel widths left and right to inner epidermis edge for cluster window
+        green_thresholds (list(int)): Green value thresholds concerning clustering
+
+    Returns:
+        cluster_amounts (2d array): Cluster amount per pixel width (rows) and green threshold (columns)
+    """
+    window_centers = np.asarray(inner_epi, dtype=np.intp).reshape(-1, 2)
+    width = orig_img.shape[1]
+    thresholds = np.asarray(green_thresholds)
+    widest = max(pixel_widths)
+
+    # widest band; columns outside of the image are clipped, they only belong to windows that are dropped
+    columns = np.clip(window_centers[:, 1:] + np.arange(-widest, widest + 1), 0, width - 1)
+    band = orig_img[:, :, 1][window_centers[:, :1], columns]
+    band = np.where(band > thresholds.min(), band, 0)
+
+    cluster_amounts = np.zeros((len(pixel_widths), len(thresholds)), dtype=np.int64)
+    x = window_centers[:, 1]
+    for i, pixel_width in enumerate(pixel_widths):
+        # same border handling as `Cluster`
+        inside = (x - pixel_width >= 0) & (x + pixel_width + 1 <= width - 1)
+        windows = band[inside, widest - pixel_width:widest + pixel_width + 1]
+        if windows.size == 0:
+            continue
+        labeled_array, counts = label(windows, return_num=True)
+        cluster_values = np.zeros(counts + 1, dtype=windows.dtype)
+        cluster_values[labeled_array.ravel()] = windows.ravel()
+        cluster_values = np.sort(cluster_values[1:])
+        cluster_amounts[i] = counts - np.searchsorted(cluster_values, thresholds, side="right")
+    return cluster_amounts
+
+
+def run_sweep(img_dir, pixel_widths, green_thresholds, csv_path=None, workers=1, edge_cache_dir=None) -> list:
+    """ Counts the clusters of every image pair of a directory for a grid of pixel widths and green thresholds.
+
+    Every pair is read and traced once (or its edges are taken from the edge cache), no matter how large the grid is.
+
+    Args:
+        img_dir (str): Directory with the original images and annotations
+        pixel_widths (list(int)): Pixel widths left and right to inner epidermis edge for cluster window
+        green_thresholds (list(int)): Green value thresholds concerning clustering
+        csv_path (str): Path of the sweep table; None to not write one
+        workers (int): Number of processes
+        edge_cache_dir (str): Directory of the edge cache (see `EdgeCache`); None to always trace
+
+    Returns:
+        results (list(dict)): Rows with the fields in SWEEP_FIELDS, ordered by subject, pixel width and threshold;
+                              subjects that failed or without a unique image pair only have one row with an "error"
+    """
+    file_pairs, problems = get_file_pairs(images_paths=scan_image_files(img_dir))
+    tasks = [dict(img_dir=img_dir, annot_file=annot_file, orig_file=orig_file, pixel_widths=pixel_widths,
+                  green_thresholds=green_thresholds, edge_cache_dir=edge_cache_dir)
+             for annot_file, orig_file in file_pairs]
+    if workers <= 1:
+        tables = [_sweep_pair(**task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            tables = [future.result() for future in [executor.submit(_sweep_pair, **task) for task in tasks]]
+
+    results = [row for table in tables for row in table]
+    results.extend(dict(dict.fromkeys(SWEEP_FIELDS, None), subject=subject, error=problem)
+                   for subject, problem in problems.items())
+    results.sort(key=lambda row: (row["subject"], row["pixel_width"] or 0, row["green_threshold"] or 0))
+    if csv_path is not None:
+        with open(csv_path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=SWEEP_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    return results
+
+
+def _sweep_pair(img_dir, annot_file, orig_file, pixel_widths, green_thresholds, edge_cache_dir=None) -> list:
+    """ Counts the clusters of one image pair for every parameter combination; runs in a worker process.
+
+    Returns:
+        table (list(dict)): Rows with the fields in SWEEP_FIELDS; one row with an "error" if the pair failed
+    """
+    subject = annot_file.split("_")[0]
+    try:
+        annot_path = os.path.join(img_dir, annot_file)
+        edge_cache = EdgeCache(edge_cache_dir) if edge_cache_dir is not None else None
+        cache_key = edge_cache.key(annot_path) if edge_cache is not None else None
+        annotation_edges = edge_cache.get(cache_key) if edge_cache is not None else None
+        if annotation_edges is None:
+            annot_img = read_image(annot_path, color=False)
+            if annot_img is None:
+                raise ValueError("image could not be read")
+            annotation_edges, _ = Walker(annotation_img=annot_img).get_annotation_edges()
+            if edge_cache is not None:
+                edge_cache.put(cache_key, annotation_edges)
+        orig_img = read_image(os.path.join(img_dir, orig_file), color=True)
+        if orig_img is None:
+            raise ValueError("image could not be read")
+
+        inner_epidermis = get_inner_epidermis(annotation_edges=annotation_edges)
+        cluster_amounts = sweep_cluster_amounts(orig_img=orig_img, inner_epi=inner_epidermis,
+                                                pixel_widths=pixel_widths, green_thresholds=green_thresholds)
+    except Exception as e:
+        return [dict(dict.fromkeys(SWEEP_FIELDS, None), subject=subject,
+                     error="{}: {}".format(type(e).__name__, e))]
+
+    return [dict(subject=subject, pixel_width=pixel_width, green_threshold=green_threshold,
+                 inner_epidermis_length=len(inner_epidermis), cluster_amount=int(cluster_amounts[i, j]), error="")
+            for i, pixel_width in enumerate(pixel_widths) for j, green_threshold in enumerate(green_thresholds)]
+
+
+def main():
+    """ Parses command line arguments and runs a parameter sweep over a directory of image pairs. """
+    parser = argparse.ArgumentParser(description="Count clusters for a grid of pixel widths and green thresholds.")
+    parser.add_argument("input_dir", help="Directory with the original images and their annotations.")
+    parser.add_argument("--pixel-widths", type=int, nargs="+", default=[PIXEL_WIDTH],
+                        help="Pixel widths left and right to the inner epidermis edge for the cluster window.")
+    parser.add_argument("--green-thresholds", type=int, nargs="+", default=[GREEN_THRESHOLD],
+                        help="Green value thresholds for clustering.")
+    parser.add_argument("--output-dir", default=".", help="Directory for the sweep table.")
+    parser.add_argument("--csv", default="sweep.csv",
+                        help="File name of the sweep table in the output directory (default: sweep.csv).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of processes (default: number of cores).")
+    parser.add_argument("--edge-cache", default=None, help="Directory of a cache of the traced annotation edges.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    os.makedirs(args.output_dir, exist_ok=True)
+    results = run_sweep(img_dir=args.input_dir, pixel_widths=args.pixel_widths,
+                        green_thresholds=args.green_thresholds, csv_path=os.path.join(args.output_dir, args.csv),
+                        workers=args.workers, edge_cache_dir=args.edge_cache)
+    failed = {row["subject"] for row in results if row["error"]}
+    print("Swept {} parameter combinations over {} subjects ({} failed or skipped) in {:.1f}s".format(
+        len(args.pixel_widths) * len(args.green_thresholds), len({row["subject"] for row in results}), len(failed),
+        time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
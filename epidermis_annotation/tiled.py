@@ -0,0 +1,368 @@
+import os
+import cv2
+import numpy as np
+from collections import OrderedDict
+from skimage.measure import label
+from walker import Walker, CANNY_THRESHOLDS
+from cluster import Cluster
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+TILE_SIZE = 2048
+
+# context around a tile for the canny filter (sobel aperture and non-maximum suppression), so tiles match the canny
+# filter of the whole image
+CANNY_MARGIN = 8
+
+
+class ArrayImage:
+    """ Image that is already in memory, with the region interface of `MemmapImage`.
+
+    Attributes:
+        array (2d or 3d array): Image
+        shape (tuple): Shape of the image
+        rgb (bool): Channel order is RGB instead of OpenCV's BGR
+    """
+    def __init__(self, array, rgb=False):
+        """ Constructor. """
+        self.array = array
+        self.shape = array.shape
+        self.rgb = rgb
+
+    def read_region(self, y0, y1, x0, x1):
+        """ Returns a copy of the region [y0:y1, x0:x1]. """
+        return np.array(self.array[y0:y1, x0:x1])
+
+
+class MemmapImage:
+    """ Uncompressed image on disk (.npy file or uncompressed TIFF) that is read region by region.
+
+    Every read maps only the rows of the requested region and unmaps them afterwards, so the memory used depends on
+    the region size and not on the image size.
+
+    Attributes:
+        path (str): Path of the image file
+        shape (tuple): Shape of the image, (height, width) or (height, width, channels)
+        dtype (np.dtype): Pixel type
+        offset (int): Byte offset of the pixel data in the file
+        rgb (bool): Channel order is RGB instead of OpenCV's BGR
+    """
+    def __init__(self, path, shape, dtype, offset, rgb=False):
+        """ Constructor. """
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.offset = offset
+        self.rgb = rgb
+
+    def read_region(self, y0, y1, x0, x1):
+        """ Returns a copy of the region [y0:y1, x0:x1]. """
+        row_bytes = int(np.prod(self.shape[1:])) * self.dtype.itemsize
+        rows = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset + y0 * row_bytes,
+                         shape=(y1 - y0,) + self.shape[1:])
+        region = np.array(rows[:, x0:x1])
+        del rows
+        return region
+
+
+def open_image(path, color):
+    """ Opens an image for region-wise reading.
+
+    .npy files (in OpenCV's BGR order) and, if tifffile is installed, uncompressed TIFF files are memory-mapped;
+    other files are read completely with OpenCV.
+
+    Args:
+        path (str): Path of the image
+        color (bool): Color image (original) instead of grayscale (annotation); only used for files read by OpenCV
+
+    Returns:
+        image (MemmapImage or ArrayImage): Image with `shape` and `read_region`
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        array = np.load(path, mmap_mode="r")
+        image = MemmapImage(path, array.shape, array.dtype, array.offset)
+        del array
+        return image
+    if extension in (".tif", ".tiff") and tifffile is not None:
+        try:
+            array = tifffile.memmap(path, mode="r")
+        except ValueError:
+            # compressed or not contiguous, cannot be memory-mapped
+            pass
+        else:
+            image = MemmapImage(path, array.shape, array.dtype, array.offset, rgb=array.ndim == 3)
+            del array
+            return image
+    array = cv2.imread(path, cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE)
+    if array is None:
+        raise ValueError("image could not be read")
+    return ArrayImage(array)
+
+
+class TiledCanny:
+    """ Canny filtered annotation that is computed tile by tile when the walker reaches a tile.
+
+    Supports the accesses of `Walker`: flat pixel indices (y * width + x) and row/column slices. Only the most
+    recently used `max_tiles` tiles are kept, so the walker only ever holds the tiles around the traced edge.
+
+    Attributes:
+        annotation_img (MemmapImage or ArrayImage): Annotation (grayscale)
+        tile_size (int): Height and width of a tile in pixels
+        max_tiles (int): Number of cached tiles
+        shape (tuple): Height and width of the annotation
+    """
+    def __init__(self, annotation_img, tile_size=TILE_SIZE, max_tiles=9):
+        """ Constructor. """
+        self.annotation_img = annotation_img
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.shape = tuple(annotation_img.shape[:2])
+        self._tiles = OrderedDict()
+        self._last_tile_key = None
+        self._last_tile = None
+
+    def __getitem__(self, key):
+        """ Returns the pixel at a flat index or the canny filtered region of a (rows, columns) slice. """
+        if isinstance(key, tuple):
+            rows, columns = key
+            y0, y1, _ = rows.indices(self.shape[0])
+            x0, x1, _ = columns.indices(self.shape[1])
+            return self._canny_region(y0, y1, x0, x1)
+
+        y, x = divmod(key, self.shape[1])
+        tile_key = (y // self.tile_size, x // self.tile_size)
+        if tile_key != self._last_tile_key:
+            self._last_tile = self._get_tile(tile_key)
+            self._last_tile_key = tile_key
+        tile, tile_width = self._last_tile
+        return tile[(y % self.tile_size) * tile_width + x % self.tile_size]
+
+    def _get_tile(self, tile_key):
+        """ Returns a tile as flat memoryview and its width, computing it on first use. """
+        tile = self._tiles.get(tile_key)
+        if tile is not None:
+            self._tiles.move_to_end(tile_key)
+            return tile
+        y0 = tile_key[0] * self.tile_size
+        x0 = tile_key[1] * self.tile_size
+        region = self._canny_region(y0, min(y0 + self.tile_size, self.shape[0]),
+                                    x0, min(x0 + self.tile_size, self.shape[1]))
+        tile = (memoryview(np.ascontiguousarray(region)).cast("B"), region.shape[1])
+        self._tiles[tile_key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def _canny_region(self, y0, y1, x0, x1):
+        """ Applies the canny filter to a region with some context and crops the context again. """
+        height, width = self.shape
+        context_y0 = max(y0 - CANNY_MARGIN, 0)
+        context_x0 = max(x0 - CANNY_MARGIN, 0)
+        region = self.annotation_img.read_region(context_y0, min(y1 + CANNY_MARGIN, height),
+                                                 context_x0, min(x1 + CANNY_MARGIN, width))
+        img_canny = cv2.Canny(region, *CANNY_THRESHOLDS)
+        return img_canny[y0 - context_y0:y1 - context_y0, x0 - context_x0:x1 - context_x0]
+
+
+class TiledWalker(Walker):
+    """ Walker on a region-wise readable annotation; the canny filter is only applied to the tiles along the edges.
+
+    Attributes:
+        tile_size (int): Height and width of a canny tile in pixels
+    """
+    def __init__(self, annotation_img, tile_size=TILE_SIZE):
+        """ Constructor.
+
+        Args:
+            annotation_img (MemmapImage or ArrayImage): Annotation (grayscale)
+            tile_size (int): Height and width of a canny tile in pixels
+        """
+        super().__init__(annotation_img=annotation_img)
+        self.tile_size = tile_size
+
+    def _get_img_canny(self):
+        """ Returns the lazily computed canny filtered image. """
+        return TiledCanny(self.annotation_img, tile_size=self.tile_size)
+
+
+class TiledCluster(Cluster):
+    """ Cluster on a region-wise readable original image.
+
+    The windows are processed in chunks of `tile_size` consecutive edge coordinates; only the bounding region of a
+    chunk is read. Clusters are labeled per chunk, and clusters that continue across the border of two chunks are
+    merged, so the amount equals labeling all windows at once.
+
+    Attributes:
+        tile_size (int): Number of windows per chunk
+    """
+    def __init__(self, orig_img, inner_epi, pixel_width, green_threshold, tile_size=TILE_SIZE):
+        """ Constructor.
+
+        Args:
+            orig_img (MemmapImage or ArrayImage): Original image (rgb)
+            inner_epi (list or 2d array): [y, x] coordinates of inner epidermis edge
+            pixel_width (int): User defined pixel width left and right to inner epidermis edge for cluster window
+            green_threshold (int): User defined value for green value threshold concerning clustering
+            tile_size (int): Number of windows per chunk
+        """
+        super().__init__(orig_img=orig_img, inner_epi=inner_epi, pixel_width=pixel_width,
+                         green_threshold=green_threshold)
+        self.tile_size = tile_size
+
+    def get_cluster_amount(self) -> tuple:
+        """ Returns cluster amount after creating cluster window and searching for clusters chunk by chunk.
+
+        Returns:
+             cluster_amount (int): Amount of clusters in window
+             window_centers (2d array): [y, x] edge coordinates of the windows, shape (n, 2)
+        """
+        window_centers = self._get_window_centers()
+        cluster_amount = 0
+        label_offset = 0
+        label_parents = {}
+        previous_row = None
+        for start in range(0, len(window_centers), self.tile_size):
+            centers = window_centers[start:start + self.tile_size]
+            y0, x0 = centers.min(axis=0)
+            y1, x1 = centers.max(axis=0) + 1
+            green_channel = self.orig_img.read_region(y0, y1, x0 - self.pixel_width, x1 + self.pixel_width)[:, :, 1]
+            windows = self._get_green_windows(green_channel=green_channel, window_centers=centers,
+                                              origin=(y0, x0 - self.pixel_width))
+            labeled_array, counts = label(windows, return_num=True)
+
+            # labels are numbered across chunks, so clusters of different chunks can be merged
+            first_labels = np.where(labeled_array[0] > 0, labeled_array[0] + label_offset, 0)
+            cluster_amount += counts
+            if previous_row is not None:
+                for previous_label, next_label in _touching_labels(previous_row, (windows[0], first_labels)):
+                    if _union(label_parents, previous_label, next_label):
+                        cluster_amount -= 1
+            last_labels = np.where(labeled_array[-1] > 0, labeled_array[-1] + label_offset, 0)
+            previous_row = (windows[-1], last_labels)
+            label_offset += counts
+        return cluster_amount, window_centers
+
+
+def _touching_labels(previous_row, next_row) -> set:
+    """ Returns the label pairs of two consecutive window rows that belong to the same cluster (equal value,
+        8-connectivity like `skimage.measure.label`).
+
+    Args:
+        previous_row (tuple): Thresholded values and labels of the last window of a chunk
+        next_row (tuple): Thresholded values and labels of the first window of the next chunk
+
+    Returns:
+        pairs (set(tuple)): (previous label, next label) pairs
+    """
+    previous_values, previous_labels = previous_row
+    next_values, next_labels = next_row
+    width = len(next_values)
+    pairs = set()
+    for shift in (-1, 0, 1):
+        next_columns = slice(max(-shift, 0), width - max(shift, 0))
+        previous_columns = slice(max(shift, 0), width - max(-shift, 0))
+        touching = ((next_values[next_columns] == previous_values[previous_columns]) &
+                    (next_values[next_columns] != 0))
+        pairs.update(zip(previous_labels[previous_columns][touching].tolist(),
+                         next_labels[next_columns][touching].tolist()))
+    return pairs
+
+
+def _union(parents, first, second) -> bool:
+    """ Merges the sets of two labels in a union-find forest.
+
+    Returns:
+        (bool): True if the labels were in different sets
+    """
+    first_root = _find(parents, first)
+    second_root = _find(parents, second)
+    if first_root == second_root:
+        return False
+    parents[second_root] = first_root
+    return True
+
+
+def _find(parents, label_id):
+    """ Returns the root label of a label's set, compressing the path. """
+    root = label_id
+    while parents.get(root, root) != root:
+        root = parents[root]
+    while label_id != root:
+        parents[label_id], label_id = root, parents.get(label_id, root)
+    return root
+
+
+def render_preview(orig_img, annot_img, window_centers, pixel_width, size=1024, tile_size=TILE_SIZE):
+    """ Renders the 2x2 visualization (original, window mask, annotation, filtered original) from downsampled tiles,
+        without holding any full resolution image.
+
+    Args:
+        orig_img (MemmapImage or ArrayImage): Original image
+        annot_img (MemmapImage or ArrayImage): Annotation (grayscale)
+        window_centers (2d array): [y, x] edge coordinates of the windows
+        pixel_width (int): Pixel width of the windows left and right to the edge coordinate
+        size (int): Height and width of the preview
+        tile_size (int): Height and width of the tiles that are read
+
+    Returns:
+        preview (3d array): Preview of size x size pixels (BGR)
+    """
+    panel_size = size // 2
+    orig_panel = _downsample(orig_img, panel_size, tile_size)
+    if orig_img.rgb:
+        orig_panel = cv2.cvtColor(orig_panel, cv2.COLOR_RGB2BGR)
+    annot_panel = cv2.cvtColor(_downsample(annot_img, panel_size, tile_size), cv2.COLOR_GRAY2BGR)
+
+    mask = window_mask(window_centers, pixel_width, orig_img.shape[:2], panel_size)
+    windows_panel = np.repeat(mask[:, :, None], 3, axis=2).astype(np.uint8) * 255
+    filtered_panel = orig_panel * mask[:, :, None].astype(np.uint8)
+
+    return np.concatenate([np.concatenate([orig_panel, annot_panel], axis=0),
+                           np.concatenate([windows_panel, filtered_panel], axis=0)], axis=1)
+
+
+def _downsample(image, panel_size, tile_size):
+    """ Resizes an image to panel_size x panel_size pixels tile by tile. """
+    height, width = image.shape[:2]
+    panel = np.zeros((panel_size, panel_size) + image.shape[2:], dtype=np.uint8)
+    scale_y = panel_size / height
+    scale_x = panel_size / width
+    for y0 in range(0, height, tile_size):
+        y1 = min(y0 + tile_size, height)
+        panel_y0, panel_y1 = round(y0 * scale_y), round(y1 * scale_y)
+        for x0 in range(0, width, tile_size):
+            x1 = min(x0 + tile_size, width)
+            panel_x0, panel_x1 = round(x0 * scale_x), round(x1 * scale_x)
+            if panel_y1 > panel_y0 and panel_x1 > panel_x0:
+                panel[panel_y0:panel_y1, panel_x0:panel_x1] = cv2.resize(
+                    image.read_region(y0, y1, x0, x1), (panel_x1 - panel_x0, panel_y1 - panel_y0),
+                    interpolation=cv2.INTER_AREA)
+    return panel
+
+
+def window_mask(window_centers, pixel_width, shape, panel_size):
+    """ Draws the windows scaled to panel_size x panel_size pixels with a difference array (no loop per window).
+
+    Args:
+        window_centers (2d array): [y, x] edge coordinates of the windows
+        pixel_width (int): Pixel width of the windows left and right to the edge coordinate
+        shape (tuple(int)): Height and width of the full resolution image
+        panel_size (int): Height and width of the mask
+
+    Returns:
+        mask (2d array): True where a window covers the panel pixel
+    """
+    height, width = shape
+    mask = np.zeros((panel_size, panel_size + 1), dtype=np.int32)
+    if len(window_centers) > 0:
+        rows = np.minimum(window_centers[:, 0] * panel_size // height, panel_size - 1)
+        starts = np.minimum((window_centers[:, 1] - pixel_width) * panel_size // width, panel_size - 1)
+        stops = np.minimum((window_centers[:, 1] + pixel_width) * panel_size // width + 1, panel_size)
+        np.add.at(mask, (rows, starts), 1)
+        np.add.at(mask, (rows, stops), -1)
+    return np.cumsum(mask, axis=1)[:, :panel_size] > 0
@@ -1,4 +1,24 @@
 import cv2
+import numpy as np
+
+
+# lower and upper threshold of the canny filter
+CANNY_THRESHOLDS = (50, 150)
+
+# maximal number of steps per edge; a walker that is stuck inside the image stops after this many steps
+MAX_STEPS = 200000
+
+# steps the walker takes per direction (dy, dx): orthogonal pixels are checked first, then diagonal pixels, then the
+# same with a step size of 2 to jump over artifacts (gaps) in the canny edge
+_STEP_RINGS = (
+    ((1, 0), (0, 1), (-1, 0), (0, -1)),
+    ((1, 1), (-1, 1), (-1, -1), (1, -1)),
+    ((2, 0), (0, 2), (-2, 0), (0, -2)),
+    ((2, 2), (-2, 2), (-2, -2), (2, -2)),
+)
+
+# step ring per direction counter (number of failed steps since the last edge pixel); counters above 16 use the last
+_RING_OF_COUNTER = (0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3)
 
 
 class Walker:
@@ -13,11 +33,11 @@ class Walker:
         """
         self.annotation_img = annotation_img
 
-    def get_annotation_edges(self) -> tuple(list(list(tuple)), np.array):
+    def get_annotation_edges(self) -> tuple:
         """ Returns coordinates of inner epidermis using annotation edges with canny filter.
 
         Returns:
-            annotation_edges (list(list(tuple))): Contains coordinates of inner epidermis using annotation edges
+            annotation_edges (list(list(list))): Contains [y, x] coordinates of the annotation edges
             img_canny (2d array): Canny edge filtered annotation image (grayscale)
         """
         img_canny = self._get_img_canny()
@@ -26,92 +46,152 @@ class Walker:
 
     def _get_img_canny(self):
         """ Returns canny filtered image. """
-        return cv2.Canny(self.annotation_img, 50, 150)
+        return cv2.Canny(self.annotation_img, *CANNY_THRESHOLDS)
 
-    def _run_walker(self, img_canny) -> list(list(tuple)):
+    def _run_walker(self, img_canny) -> list:
         """ Runs a walker through canny filtered image of annotation; tracks the edges of epidermis and save coordinates.
 
+        Every edge pixel in the lowest row that contains edge pixels is a starting point. The walker state (direction
+        and direction counter) carries over from one edge to the next.
+
         Args:
-            img_canny (2d array): Canny edge filtered annotation image (grayscale)
+            img_canny (2d array): Canny edge filtered annotation image (grayscale), or an object with `shape` that
+                                  supports flat pixel indices and row/column slices (see `tiled.TiledCanny`)
 
         Returns:
-            annotation_edges (list(list(tuple))): Contains coordinates of inner epidermis using annotation edges
+            annotation_edges (list(list(list))): Contains [y, x] coordinates of the annotation edges
         """
-        # get starting point from bottom of picture
-        starting_coord_walker = []
-        k = 1
-        while len(starting_coord_walker) == 0:
+        starting_coord_walker = self._get_starting_points(img_canny=img_canny)
 
-            for i in range(img_canny.shape[1] - 1):
-                if img_canny[img_canny.shape[1] - k][i] > 128:
-                    starting_coord_walker.append([img_canny.shape[1] - k, i])
-            k += 1
+        if isinstance(img_canny, np.ndarray):
+            # flat view of the pixels, indexing it is much faster than indexing the array pixel by pixel
+            edge_pixels = memoryview(np.ascontiguousarray(img_canny, dtype=np.uint8)).cast("B")
+        else:
+            edge_pixels = img_canny
 
-        # define the steps the walker will take
-        dy_orth = [1, 0, -1, 0]
-        dx_orth = [0, 1, 0, -1]
-
-        dy_diag = [1, -1, -1, 1]
-        dx_diag = [1, 1, -1, -1]
-
-        # define the initial direction the walker will take
+        # define the initial direction the walker will take and the direction counter, which makes sure the
+        # orthogonal directions are checked first
         current_direction = 0
-
-        # direction counter to make sure the orthogonal directions are check first
         direction_counter = 0
 
         # run walker
         annotation_edges = list()
         for starting_point in starting_coord_walker:
-            coordinates = [starting_point]
-
-            reached_end = False
-            steps_counter = 0
-            max_steps = 200000
-            while not reached_end:
-                # breaks if no border is present by reaching max steps
-                if steps_counter > max_steps:
-                    break
-
-                # makes sure to check orthogonal pixel first, then diagonal
-                if direction_counter > 4:
-                    y = coordinates[-1][0] + dy_diag[current_direction]
-                    x = coordinates[-1][1] + dx_diag[current_direction]
-                else:
-                    y = coordinates[-1][0] + dy_orth[current_direction]
-                    x = coordinates[-1][1] + dx_orth[current_direction]
-
-                # handles artifacts
-                if direction_counter > 8:
-                    dy_orth_artifact = [2, 0, -2, 0]
-                    dx_orth_artifact = [0, 2, 0, -2]
-                    y = coordinates[-1][0] + dy_orth_artifact[current_direction]
-                    x = coordinates[-1][1] + dx_orth_artifact[current_direction]
-
-                if direction_counter > 12:
-                    dy_diag_artifact = [2, -2, -2, 2]
-                    dx_diag_artifact = [2, 2, -2, -2]
-                    y = coordinates[-1][0] + dy_diag_artifact[current_direction]
-                    x = coordinates[-1][1] + dx_diag_artifact[current_direction]
-
-                # checks for border of image
-                if y < 0 or y > (self.annotation_img.shape[0] - 1) or x < 0 or x > (self.annotation_img.shape[1] - 1):
-                    current_direction = (current_direction + 1) % 4
-                    direction_counter += 1
-                    if not len(coordinates) == 1:  # handles first coordinate is at border -> breaks while loop
-                        reached_end = True
-                    continue
-
-                if img_canny[y][x] != 0 and not [y, x] in coordinates:
-                    coordinates.append([y, x])
-                    current_direction = 0
-                    direction_counter = 0
-                else:
-                    # If the next step is not along an edge, try the next direction
-                    current_direction = (current_direction + 1) % 4
-                    direction_counter += 1
-
-                steps_counter += 1
+            coordinates, current_direction, direction_counter = self._trace_edge(
+                edge_pixels=edge_pixels, shape=img_canny.shape, starting_point=starting_point,
+                current_direction=current_direction, direction_counter=direction_counter)
             annotation_edges.append(coordinates)
 
         return annotation_edges
+
+    @staticmethod
+    def _get_starting_points(img_canny) -> list:
+        """ Returns the edge pixels of the lowest row of the image that contains edge pixels (the last column is not
+            considered).
+
+        Args:
+            img_canny (2d array): Canny edge filtered annotation image (grayscale)
+
+        Returns:
+            starting_coord_walker (list(list)): [y, x] coordinates of the starting points; empty if there is no edge
+        """
+        # scan blocks of rows from the bottom, the edges usually start in the very last rows
+        block_rows = 64
+        for stop in range(img_canny.shape[0], 0, -block_rows):
+            start = max(stop - block_rows, 0)
+            edge_mask = img_canny[start:stop, :-1] > 128
+            rows = np.flatnonzero(edge_mask.any(axis=1))
+            if len(rows) > 0:
+                y = start + int(rows[-1])
+                return [[y, int(x)] for x in np.flatnonzero(edge_mask[rows[-1]])]
+        return []
+
+    @staticmethod
+    def _trace_edge(edge_pixels, shape, starting_point, current_direction, direction_counter) -> tuple:
+        """ Follows one edge from a starting point until it leaves the image or the walker is stuck.
+
+        Visited pixels are kept in a set, so every step takes constant time.
+
+        Args:
+            edge_pixels (memoryview): Flat canny image
+            shape (tuple): Height and width of the canny image
+            starting_point (list): [y, x] coordinate to start from
+            current_direction (int): Direction (0-3) of the first step
+            direction_counter (int): Failed steps so far; decides between orthogonal, diagonal and artifact steps
+
+        Returns:
+            coordinates (list(list)): [y, x] coordinates of the edge
+            current_direction (int): Direction after the last step
+            direction_counter (int): Direction counter after the last step
+        """
+        height, width = shape
+        y, x = starting_point
+        coordinates = [[y, x]]
+        visited = {y * width + x}
+        steps_counter = 0
+        # failed steps at the current pixel; the direction counter may already be high from the previous edge
+        failed_steps = 0
+        while steps_counter <= MAX_STEPS:
+            if direction_counter > 16 and failed_steps >= 4:
+                # all four artifact steps failed here, nothing changes anymore: skip the remaining steps at once
+                current_direction, direction_counter = Walker._skip_stuck_steps(
+                    shape, y, x, steps_counter, current_direction, direction_counter)
+                break
+
+            dy, dx = _STEP_RINGS[_RING_OF_COUNTER[min(direction_counter, 16)]][current_direction]
+            next_y = y + dy
+            next_x = x + dx
+
+            # checks for border of image
+            if next_y < 0 or next_y >= height or next_x < 0 or next_x >= width:
+                current_direction = (current_direction + 1) % 4
+                direction_counter += 1
+                failed_steps += 1
+                if len(coordinates) != 1:  # handles first coordinate is at border
+                    break
+                continue
+
+            index = next_y * width + next_x
+            if edge_pixels[index] != 0 and index not in visited:
+                visited.add(index)
+                coordinates.append([next_y, next_x])
+                y = next_y
+                x = next_x
+                current_direction = 0
+                direction_counter = 0
+                failed_steps = 0
+            else:
+                # If the next step is not along an edge, try the next direction
+                current_direction = (current_direction + 1) % 4
+                direction_counter += 1
+                failed_steps += 1
+
+            steps_counter += 1
+        return coordinates, current_direction, direction_counter
+
+    @staticmethod
+    def _skip_stuck_steps(shape, y, x, steps_counter, current_direction, direction_counter) -> tuple:
+        """ Computes the walker state after it kept failing until MAX_STEPS, without taking the steps.
+
+        Once the four artifact steps of the last ring failed, the walker only cycles through them; steps that leave
+        the image (only possible at the starting point) are not counted as steps.
+
+        Returns:
+            current_direction (int): Direction after the last step
+            direction_counter (int): Direction counter after the last step
+        """
+        height, width = shape
+        in_bounds = [0 <= y + dy < height and 0 <= x + dx < width for dy, dx in _STEP_RINGS[-1]]
+        cycle_steps = sum(in_bounds)
+        if cycle_steps == 0:
+            return current_direction, direction_counter
+
+        # a full cycle does not change the direction, so all but the last cycles are skipped at once
+        cycles = max((MAX_STEPS - steps_counter) // cycle_steps - 1, 0)
+        steps_counter += cycles * cycle_steps
+        direction_counter += cycles * 4
+        while steps_counter <= MAX_STEPS:
+            steps_counter += in_bounds[current_direction]
+            current_direction = (current_direction + 1) % 4
+            direction_counter += 1
+        return current_direction, direction_counter
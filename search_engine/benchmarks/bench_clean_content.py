@@ -0,0 +1,55 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import time
+import argparse
+from urllib.parse import urlparse
+from search_engine.src.crawler import Crawler
+from search_engine.src.page_parser import parse_page
+from search_engine.benchmarks.local_site import generate_site
+
+
+def clean_content_previous(page_text: str, title: str) -> str:
+    """Previous implementation: per-line `any(...)` over the skip phrases, empty lines kept."""
+    skip_phrases = [title.lower(), "this is page "]
+    cleaned_lines = []
+    for line in page_text.split('\n'):
+        lower_line = line.strip().lower()
+        if any(lower_line.startswith(sp) or lower_line == sp for sp in skip_phrases):
+            continue
+        cleaned_lines.append(line.strip())
+    return ". ".join(cleaned_lines)
+
+
+def main() -> None:
+    """Cleans the text of generated pages with the previous and the current implementation and prints throughput
+    and output size."""
+    parser = argparse.ArgumentParser(description="Throughput of Crawler._clean_content.")
+    parser.add_argument("--pages", type=int, default=300, help="Number of generated pages.")
+    parser.add_argument("--sentences", type=int, default=300, help="Sentences per page (page size).")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of passes over all pages.")
+    args = parser.parse_args()
+
+    base_url = urlparse("http://127.0.0.1/index.html")
+    texts = []
+    for path, html in generate_site(args.pages, sentences_per_page=args.sentences).items():
+        page = parse_page(html, "http://127.0.0.1" + path, base_url)
+        texts.append((page.text, page.title))
+    # real pages are indented and full of blank lines and runs of whitespace between inline elements
+    indented_texts = [(text.replace("\n", "\n\n    \t").replace(" ", "  "), title) for text, title in texts]
+
+    for texts_name, page_texts in (("generated pages", texts), ("indented pages", indented_texts)):
+        input_mb = sum(len(text) for text, _ in page_texts) / 1e6
+        print(f"{texts_name} ({input_mb:.2f} MB)")
+        for name, clean in (("previous", clean_content_previous), ("single pass", Crawler._clean_content)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                output_chars = sum(len(clean(text, title)) for text, title in page_texts)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:12s} {input_mb * args.repeat / elapsed:7.1f} MB/s  output {output_chars / 1e6:6.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
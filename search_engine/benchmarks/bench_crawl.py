@@ -0,0 +1,38 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import time
+import argparse
+import tempfile
+from search_engine.src.crawler import Crawler
+from search_engine.benchmarks.local_site import generate_site, serve_site
+
+
+def main() -> None:
+    """Crawls a generated local site with increasing numbers of workers and prints pages per second."""
+    parser = argparse.ArgumentParser(description="Crawl throughput for different concurrency settings.")
+    parser.add_argument("--pages", type=int, default=2000, help="Number of pages of the generated site.")
+    parser.add_argument("--links", type=int, default=5, help="Links per page.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Artificial server latency in seconds.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16], help="Worker counts to compare.")
+    args = parser.parse_args()
+
+    server, base_url = serve_site(generate_site(args.pages, links_per_page=args.links), latency=args.latency)
+    try:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as index_path:
+                crawler = Crawler(url=base_url, index_path=index_path, workers=workers)
+                start = time.perf_counter()
+                crawler.crawl()
+                elapsed = time.perf_counter() - start
+                doc_count = crawler.index.doc_count()
+                print(f"workers={workers:3d}  pages={doc_count}  time={elapsed:.2f}s  "
+                      f"pages/s={doc_count / elapsed:.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
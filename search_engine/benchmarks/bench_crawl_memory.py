@@ -0,0 +1,67 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import time
+import argparse
+import tempfile
+import tracemalloc
+from search_engine.src.crawler import Crawler
+from search_engine.benchmarks.local_site import generate_site, serve_site
+
+
+def add_large_documents(pages: dict, huge_page_mb: int, binary_mb: int) -> dict:
+    """Links a huge html page and a binary document from the index page.
+
+    Args:
+        pages (dict): Generated site, see `generate_site`.
+        huge_page_mb (int): Size of the huge html page in MB.
+        binary_mb (int): Size of the binary (PDF) document in MB.
+
+    Returns:
+        pages (dict): The site including the large documents.
+    """
+    pages = dict(pages)
+    pages["/index.html"] = pages["/index.html"].replace(
+        "</body>", '<a href="/huge.html">huge</a>\n<a href="/report.pdf">report</a>\n</body>')
+    paragraph = "<p>" + "quokka numbat wallaby " * 40 + "</p>\n"
+    pages["/huge.html"] = "<html><body>\n" + paragraph * (huge_page_mb * 1024 * 1024 // len(paragraph)) + "</body></html>"
+    pages["/report.pdf"] = ("application/pdf", b"%PDF-1.4\n" + bytes(binary_mb * 1024 * 1024))
+    return pages
+
+
+def main() -> None:
+    """Crawls generated sites of increasing size and prints the peak memory of the crawl."""
+    parser = argparse.ArgumentParser(description="Peak memory of the streaming crawl for different site sizes.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 5000], help="Site sizes to compare.")
+    parser.add_argument("--huge-page-mb", type=int, default=20, help="Size of a linked huge html page in MB.")
+    parser.add_argument("--binary-mb", type=int, default=20, help="Size of a linked PDF document in MB.")
+    parser.add_argument("--max-page-mb", type=float, default=5, help="Maximal page size of the crawler in MB.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of crawl workers.")
+    args = parser.parse_args()
+
+    for n_pages in args.pages:
+        pages = add_large_documents(generate_site(n_pages), args.huge_page_mb, args.binary_mb)
+        server, base_url = serve_site(pages)
+        try:
+            with tempfile.TemporaryDirectory() as index_path:
+                crawler = Crawler(url=base_url, index_path=index_path, workers=args.workers,
+                                  max_page_bytes=int(args.max_page_mb * 1024 * 1024))
+                # the site itself is served from memory by this process, so only growth during the crawl counts
+                tracemalloc.start()
+                start = time.perf_counter()
+                crawler.crawl()
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                skipped = crawler.metrics.total("crawler_skipped_total")
+                print(f"pages={n_pages:6d}  indexed={crawler.index.doc_count():6d}  skipped={skipped}  "
+                      f"time={elapsed:.2f}s  peak={peak / 1024 / 1024:.1f} MB")
+                crawler.close()
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from urllib.parse import urlparse, urljoin
+from whoosh.index import create_in
+from whoosh.qparser import QueryParser
+from whoosh.fields import Schema, TEXT, ID, DATETIME, STORED
+from search_engine.src.crawler import Crawler
+from search_engine.src.page_parser import parse_page
+from search_engine.src.snippets import sentence_ends
+from search_engine.benchmarks.local_site import generate_site, WORDS
+
+
+# previous layout: full page text and links stored inside the Whoosh segments
+LEGACY_SCHEMA = Schema(
+    url=ID(unique=True, stored=True),
+    content=TEXT(stored=True, chars=True),
+    title=TEXT(stored=True),
+    teaser=TEXT(stored=True),
+    description=TEXT(stored=True),
+    crawled_at=DATETIME(stored=True),
+    links=STORED,
+    sentence_ends=STORED
+)
+
+
+def index_size(index_path: str) -> int:
+    """Returns the size of the Whoosh segment files in bytes (without the document store)."""
+    return sum(os.path.getsize(os.path.join(index_path, name)) for name in os.listdir(index_path)
+               if name.startswith("_MAIN_") or name.endswith(".seg"))
+
+
+def hit_loading_time(index, queries: list, load_content) -> float:
+    """Searches every query and loads the stored fields of the top 50 hits plus the content of the first 10.
+
+    Returns:
+        (float): Mean time per query in milliseconds.
+    """
+    parser = QueryParser("content", schema=index.schema)
+    with index.searcher() as searcher:
+        start = time.perf_counter()
+        for query in queries:
+            results = searcher.search(parser.parse(query), limit=50)
+            fields = [hit.fields() for hit in results]
+            for hit_fields in fields[:10]:
+                load_content(hit_fields)
+        return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main() -> None:
+    """Builds the same pages into the previous (content stored in the index) and the current layout and reports
+    index size and hit-loading latency for both."""
+    parser = argparse.ArgumentParser(description="Index size and hit loading with and without stored content.")
+    parser.add_argument("--pages", type=int, default=2000, help="Number of generated pages.")
+    parser.add_argument("--sentences", type=int, default=200, help="Sentences per page (page size).")
+    args = parser.parse_args()
+
+    base_url = "http://127.0.0.1/index.html"
+    parsed_base_url = urlparse(base_url)
+    documents = []
+    for path, html in generate_site(args.pages, sentences_per_page=args.sentences).items():
+        url = urljoin(base_url, path)
+        page = parse_page(html, url, parsed_base_url)
+        content = Crawler._clean_content(page.text, page.title)
+        documents.append(dict(url=url, content=content, title=page.title, teaser=page.teaser,
+                              description=page.description, crawled_at=datetime.now(),
+                              sentence_ends=sentence_ends(content), links=sorted(page.links)))
+    queries = WORDS[:20] + [f"{a} {b}" for a, b in zip(WORDS[:10], WORDS[10:20])]
+
+    with tempfile.TemporaryDirectory() as legacy_path, tempfile.TemporaryDirectory() as current_path:
+        legacy_index = create_in(legacy_path, LEGACY_SCHEMA)
+        writer = legacy_index.writer()
+        for document in documents:
+            writer.add_document(**document)
+        writer.commit()
+
+        crawler = Crawler(url=base_url, index_path=current_path)
+        current_index = create_in(current_path, crawler.schema)
+        writer = current_index.writer()
+        for document in documents:
+            document = dict(document)
+            crawler.doc_store.put(document["url"], document["content"], document.pop("links"))
+            writer.add_document(**document)
+        crawler.doc_store.commit()
+        writer.commit()
+
+        legacy_ms = hit_loading_time(legacy_index, queries, lambda fields: fields["content"])
+        current_ms = hit_loading_time(current_index, queries,
+                                      lambda fields: crawler.doc_store.get_content(fields["url"]))
+
+        print(f"{'layout':36s} {'index MB':>9s} {'doc store MB':>13s} {'ms/query':>9s}")
+        print(f"{'content stored in index (previous)':36s} {index_size(legacy_path) / 1e6:9.2f} "
+              f"{0:13.2f} {legacy_ms:9.2f}")
+        print(f"{'compressed document store':36s} {index_size(current_path) / 1e6:9.2f} "
+              f"{crawler.doc_store.size_bytes() / 1e6:13.2f} {current_ms:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import time
+import argparse
+from urllib.parse import urlparse, urljoin
+from bs4 import BeautifulSoup
+from search_engine.src.page_parser import parse_page, create_parser, lxml
+from search_engine.benchmarks.local_site import generate_site
+
+
+def parse_two_trees(html: str, page_url: str, parsed_base_url) -> tuple:
+    """Previous crawl path: one BeautifulSoup tree for the page fields and a second one for the links."""
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.string if soup.title else page_url
+    teaser_elem = soup.find('p')
+    teaser = teaser_elem.text if teaser_elem else "No teaser available"
+    meta_description = soup.find('meta', attrs={'name': 'description'})
+    description = meta_description['content'] if meta_description else "No description available"
+    links = set()
+    for a_tag in BeautifulSoup(html, 'html.parser').find_all('a', href=True):
+        absolute_url = urljoin(page_url, a_tag['href'])
+        if urlparse(absolute_url).netloc == parsed_base_url.netloc:
+            links.add(absolute_url)
+    page_text = soup.get_text(separator=" ")
+    return title, teaser, description, links, page_text
+
+
+def check_chunked_parsing(pages: list, parsed_base_url, chunk_sizes: tuple = (1, 7)) -> list:
+    """Feeds every page to the streaming parser in chunks of the given sizes and compares the extracted fields with
+    parsing the whole body at once; text nodes split between chunks must not get a separator inside.
+
+    Args:
+        pages (list(tuple)): (page url, html) pairs.
+        parsed_base_url: Parsed url of the crawl start.
+        chunk_sizes (tuple(int)): Chunk sizes in characters.
+
+    Returns:
+        failures (list(str)): Url and chunk size of every page whose fields differ.
+    """
+    failures = []
+    for page_url, html in pages:
+        whole = parse_page(html, page_url, parsed_base_url, backend="stream")
+        for chunk_size in chunk_sizes:
+            parser = create_parser(page_url, parsed_base_url, backend="stream")
+            for start in range(0, len(html), chunk_size):
+                parser.feed(html[start:start + chunk_size])
+            chunked = parser.result()
+            if any(getattr(chunked, field) != getattr(whole, field) for field in whole.__slots__):
+                failures.append(f"{page_url} (chunks of {chunk_size})")
+    return failures
+
+
+def main() -> None:
+    """Parses generated pages with the previous two-tree path and every single-pass backend; prints pages per second."""
+    parser = argparse.ArgumentParser(description="Html parsing throughput per parser backend.")
+    parser.add_argument("--pages", type=int, default=500, help="Number of generated pages.")
+    parser.add_argument("--sentences", type=int, default=100, help="Sentences per page (page size).")
+    parser.add_argument("--links", type=int, default=50, help="Links per page.")
+    parser.add_argument("--check-pages", type=int, default=20,
+                        help="Pages checked for equal results when fed in 1 and 7 character chunks.")
+    args = parser.parse_args()
+
+    base_url = "http://127.0.0.1/index.html"
+    parsed_base_url = urlparse(base_url)
+    pages = [(urljoin(base_url, path), html) for path, html in generate_site(
+        args.pages, links_per_page=args.links, sentences_per_page=args.sentences).items()]
+
+    failures = check_chunked_parsing(pages[:args.check_pages], parsed_base_url)
+    if failures:
+        sys.exit("Chunked parsing differs from parsing the whole body: " + ", ".join(failures))
+
+    candidates = {"two bs4 trees (previous)": parse_two_trees}
+    for backend in ("bs4", "stream", "lxml"):
+        if backend == "lxml" and lxml is None:
+            print("lxml not installed, skipping the lxml backend")
+            continue
+        candidates[f"single pass '{backend}'"] = lambda html, url, base, backend=backend: parse_page(
+            html, url, base, backend=backend)
+
+    for name, parse in candidates.items():
+        start = time.perf_counter()
+        for page_url, html in pages:
+            parse(html, page_url, parsed_base_url)
+        elapsed = time.perf_counter() - start
+        print(f"{name:28s} {len(pages) / elapsed:8.1f} pages/s")
+
+
+if __name__ == '__main__':
+    main()
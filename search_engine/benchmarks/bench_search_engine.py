@@ -0,0 +1,107 @@
+import sys
+import pathlib
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import json
+import time
+import random
+import argparse
+import tempfile
+from search_engine.src import search_engine_run
+from search_engine.src.crawler import Crawler
+from search_engine.benchmarks.local_site import generate_site, serve_site, WORDS
+from search_engine.benchmarks.bench_doc_store import index_size
+
+
+def percentiles(latencies: list) -> dict:
+    """Returns p50, p95 and p99 of the given latencies.
+
+    Args:
+        latencies (list(float)): Latencies in seconds.
+
+    Returns:
+        (dict): Percentiles in milliseconds.
+    """
+    latencies = sorted(latencies)
+    return {f"p{p}": round(latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)] * 1000, 3)
+            for p in (50, 95, 99)}
+
+
+def generate_queries(n_queries: int, seed: int) -> list:
+    """Generates a mix of single-term, multi-term, boolean and phrase queries over the site vocabulary."""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n_queries):
+        a, b = rng.sample(WORDS, 2)
+        queries.append([a, f"{a} {b}", f"{a} OR {b}", f"{a} AND NOT {b}", f'"{a} {b}"'][i % 5])
+    return queries
+
+
+def measure_queries(client, queries: list, pagesize: int) -> dict:
+    """Sends every query to the Flask app's JSON endpoint and returns latency percentiles."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        response = client.get("/api/search", query_string={"q": query, "pagesize": pagesize})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return percentiles(latencies)
+
+
+def main() -> None:
+    """Crawls and indexes a generated local site, then measures query latency through the Flask app."""
+    parser = argparse.ArgumentParser(description="End-to-end search engine benchmark against a generated local site.")
+    parser.add_argument("--pages", type=int, default=2000, help="Number of pages of the generated site.")
+    parser.add_argument("--links", type=int, default=5, help="Links per page (link density).")
+    parser.add_argument("--sentences", type=int, default=20, help="Sentences per page (page size).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial server latency in seconds.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of crawl workers.")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries to measure.")
+    parser.add_argument("--pagesize", type=int, default=10, help="Hits per result page.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of site and queries.")
+    parser.add_argument("--json", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    pages = generate_site(args.pages, links_per_page=args.links, sentences_per_page=args.sentences, seed=args.seed)
+    server, base_url = serve_site(pages, latency=args.latency)
+    queries = generate_queries(args.queries, args.seed)
+    try:
+        with tempfile.TemporaryDirectory() as index_path:
+            crawler = Crawler(url=base_url, index_path=index_path, workers=args.workers)
+            start = time.perf_counter()
+            crawler.crawl()
+            crawl_seconds = time.perf_counter() - start
+
+            search_engine_run.crawler = crawler
+            client = search_engine_run.app.test_client()
+
+            # uncached: every query is searched; cached: the same queries again, answered by the result cache
+            cache_size = crawler.result_cache.maxsize
+            crawler.result_cache.maxsize = 0
+            uncached = measure_queries(client, queries, args.pagesize)
+            crawler.result_cache.maxsize = cache_size
+            measure_queries(client, queries, args.pagesize)
+            cached = measure_queries(client, queries, args.pagesize)
+
+            report = {
+                "pages": crawler.index.doc_count(),
+                "crawl_seconds": round(crawl_seconds, 3),
+                "pages_per_second": round(crawler.index.doc_count() / crawl_seconds, 1),
+                "indexing": crawler.index_stats,
+                "index_bytes": index_size(index_path),
+                "doc_store_bytes": crawler.doc_store.size_bytes(),
+                "query_latency_ms": uncached,
+                "cached_query_latency_ms": cached
+            }
+    finally:
+        server.shutdown()
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
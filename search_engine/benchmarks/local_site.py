@@ -0,0 +1,86 @@
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+WORDS = ("platypus wombat koala kangaroo echidna dingo quokka numbat wallaby possum emu cassowary kookaburra "
+         "galah lorikeet cockatoo dugong bilby bandicoot quoll river desert forest reef island coast mountain "
+         "night day small large quick slow bright dark old young").split()
+
+
+def generate_site(n_pages: int, links_per_page: int = 5, sentences_per_page: int = 10, seed: int = 0) -> dict:
+    """Generates a synthetic website of interlinked html pages.
+
+    Args:
+        n_pages (int): Number of pages; page 0 is served as "/index.html".
+        links_per_page (int): Number of random internal links per page (link density).
+        sentences_per_page (int): Number of random sentences in the page body.
+        seed (int): Random seed, the same seed always yields the same site.
+
+    Returns:
+        pages (dict): Maps url paths ("/index.html", "/page1.html", ...) to html strings.
+    """
+    rng = random.Random(seed)
+    paths = ["/index.html"] + [f"/page{i}.html" for i in range(1, n_pages)]
+    pages = {}
+    for i, path in enumerate(paths):
+        # page i always links to i + 1, so every page is reachable from the index
+        targets = [paths[(i + 1) % n_pages]] + [rng.choice(paths) for _ in range(links_per_page - 1)]
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(5, 15))).capitalize() + "."
+                     for _ in range(sentences_per_page)]
+        body = "\n".join(f"<p>{sentence}</p>" for sentence in sentences)
+        links = "\n".join(f'<a href="{target}">{target}</a>' for target in targets)
+        pages[path] = (f"<html><head><title>Page {i}</title>\n"
+                       f'<meta name="description" content="Synthetic page {i}"></head>\n'
+                       f"<body>\n<h1>Page {i}</h1>\n{body}\n{links}\n</body></html>\n")
+    return pages
+
+
+def serve_site(pages: dict, latency: float = 0.0) -> tuple:
+    """Serves the given pages from memory with a threaded local HTTP server running in a daemon thread.
+
+    Args:
+        pages (dict): Maps url paths to html strings (see `generate_site`) or to (content type, bytes) tuples for
+                      other documents.
+        latency (float): Artificial delay per response in seconds to mimic a remote server.
+
+    Returns:
+        server (ThreadingHTTPServer): Running server; call `server.shutdown()` when done.
+        base_url (str): Url of the site's index page.
+    """
+    encoded_pages = {path: page if isinstance(page, tuple) else ("text/html; charset=utf-8", page.encode("utf-8"))
+                     for path, page in pages.items()}
+
+    class SiteHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def handle(self) -> None:
+            try:
+                super().handle()
+            except ConnectionError:
+                # the crawler aborts downloads of large and non-html documents
+                pass
+
+        def do_GET(self) -> None:
+            if latency:
+                time.sleep(latency)
+            page = encoded_pages.get(self.path.split("?")[0].split("#")[0])
+            if page is None:
+                self.send_error(404)
+                return
+            content_type, body = page
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/index.html"
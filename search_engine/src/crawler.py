@@ -1,195 +1,716 @@
 import os
+import time
+import codecs
+import hashlib
+import pathlib
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-from whoosh.index import create_in
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from whoosh.index import create_in, exists_in, open_dir
 from whoosh.qparser import QueryParser
-from urllib.parse import urlparse, urljoin
-from whoosh.fields import Schema, TEXT, ID, DATETIME
+from urllib.parse import urlparse
+from whoosh.fields import Schema, TEXT, ID, DATETIME, STORED
+from search_engine.src.doc_store import DocStore
+from search_engine.src.frontier import Frontier, canonicalize_url
+from search_engine.src.indexer import IndexPipeline
+from search_engine.src.metrics import Metrics
+from search_engine.src.page_parser import create_parser
+from search_engine.src.result_cache import ResultCache
+from search_engine.src.snippets import SENTENCE_ENDINGS, sentence_ends, term_spans, best_sentence_snippet
+from search_engine.src.suggestions import TermSuggester, MAX_SUGGESTIONS
+
+
+INDEX_PATH = str(pathlib.Path(__file__).resolve().parent.parent / "index")
+REQUEST_TIMEOUT = 10
+MAX_PAGESIZE = 50
+
+# streaming fetch: pages are downloaded and parsed in chunks; larger pages, slower downloads and other content types
+# are dropped without reading (the rest of) the body
+FETCH_CHUNK_SIZE = 64 * 1024
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+FETCH_DEADLINE = 60.0
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# content cleaning: lines starting with this phrase are boilerplate of the crawled test site
+SKIP_PAGE_PHRASE = "this is page "
+
+# outcome of fetching a page during a crawl
+PAGE_CHANGED = "changed"
+PAGE_UNCHANGED = "unchanged"
+PAGE_GONE = "gone"
+PAGE_FAILED = "failed"
+PAGE_SKIPPED = "skipped"
+
+requests.packages.urllib3.util.connection.HAS_IPV6 = False
+
+
+class HostRateLimiter:
+    """Per-host politeness: spaces out requests to the same host by at least `min_interval` seconds,
+    independent of how many workers are crawling.
+
+    Attributes:
+        min_interval (float): Minimal time between two requests to the same host in seconds; 0 disables limiting.
+    """
+    def __init__(self, min_interval: float) -> None:
+        """Constructor."""
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        """Blocks until the next request to `host` may be sent.
+
+        Args:
+            host (str): Network location of the url to fetch.
+        """
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
 
 
 class Crawler:
     """Crawls given url for links, title, meta description, and content,
     then creates a Whoosh index. On query input, searches the index and returns hits.
 
+    The index is persisted in `index_path`, so it only has to be built once (see `crawl`) and can be reopened
+    later via `open_index`. All queries share one long-lived searcher, which is replaced when the index changes.
+
     Attributes:
         url (str): String of the starting URL to crawl.
+        index_path (str): Directory of the Whoosh index.
+        workers (int): Number of concurrent fetch/parse workers.
+        host_delay (float): Minimal time between two requests to the same host in seconds.
+        parser_backend (str): Html parser backend, see `page_parser.parse_page`.
+        max_depth (int): Maximal link distance from the start url; None for no limit.
+        max_pages (int): Maximal number of pages to crawl; None for no limit.
+        index_batch_size (int): Number of index operations per commit, see `IndexPipeline`.
+        index_procs (int): Number of indexing processes; > 1 uses Whoosh's multiprocessing writer.
+        index_limitmb (int): Memory limit of the index writer (per process) in MB.
+        index_multisegment (bool): With several indexing processes, keep their segments instead of merging them.
+        max_page_bytes (int): Pages with a larger body are skipped; the download stops at this size.
+        fetch_deadline (float): Pages that take longer to download in seconds are skipped.
+        content_types (tuple(str)): Media types that are downloaded and indexed; responses without a content type
+                                    are treated as html.
+        index_stats (dict): Indexing counters and documents per second of the last crawl.
+        result_cache (ResultCache): Cache of search results, keyed by index generation and normalized query.
+        metrics (Metrics): Timings and counters of fetching, parsing, indexing and searching.
     """
-    def __init__(self, url: str) -> None:
+    def __init__(self, url: str, index_path: str = INDEX_PATH, workers: int = 8, host_delay: float = 0.0,
+                 parser_backend: str = "stream", max_depth: int = None, max_pages: int = None,
+                 index_batch_size: int = 1000, index_procs: int = 1, index_limitmb: int = 128,
+                 index_multisegment: bool = False, cache_size: int = 1024, cache_ttl: float = 300.0,
+                 metrics: Metrics = None, max_page_bytes: int = MAX_PAGE_BYTES,
+                 fetch_deadline: float = FETCH_DEADLINE, content_types: tuple = HTML_CONTENT_TYPES) -> None:
         """Constructor."""
-        self.url = url
-        self.parsed_based_url = urlparse(url)
-        self.visited_urls = set()
+        self.url = canonicalize_url(url)
+        self.index_path = index_path
+        self.workers = workers
+        self.host_delay = host_delay
+        self.parser_backend = parser_backend
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.index_batch_size = index_batch_size
+        self.index_procs = index_procs
+        self.index_limitmb = index_limitmb
+        self.index_multisegment = index_multisegment
+        self.max_page_bytes = max_page_bytes
+        self.fetch_deadline = fetch_deadline
+        self.content_types = content_types
+        self.index_stats = {}
+        self.parsed_based_url = urlparse(self.url)
         self.results = []
 
         # setup Whoosh
         self.schema = Schema(
             url=ID(unique=True, stored=True),
-            content=TEXT(stored=True),
+            content=TEXT(chars=True),
             title=TEXT(stored=True),
             teaser=TEXT(stored=True),
             description=TEXT(stored=True),
-            crawled_at=DATETIME(stored=True)
+            crawled_at=DATETIME(stored=True),
+            etag=STORED,
+            last_modified=STORED,
+            content_hash=STORED,
+            sentence_ends=STORED
         )
-        index_path = "../search_engine/index"
-        if not os.path.exists(index_path):
-            os.makedirs(index_path)
-        self.index = create_in(index_path, self.schema)
-        self.writer = self.index.writer()
-
-    def crawl(self) -> None:
-        """Crawls the given URL and sub-URLs and creates a Whoosh index."""
-        visited_urls = set()
-        url_queue = [self.url]
-
-        while url_queue:
-            current_url = url_queue.pop(0)
-            if current_url not in visited_urls:
-                visited_urls.add(current_url)
-                html = self._fetch_and_parse(current_url)
-
-                if html:
-                    soup = BeautifulSoup(html, 'html.parser')
-
-                    # get title
-                    title = soup.title.string if soup.title else current_url
-
-                    # get teaser text
-                    teaser_elem = soup.find('p')
-                    teaser = teaser_elem.text if teaser_elem else "No teaser available"
-
-                    # get meta description
-                    meta_description = soup.find('meta', attrs={'name': 'description'})
-                    description = meta_description['content'] if meta_description else "No description available"
-
-                    # get links and extend URL queue
-                    links = self._extract_links(html, current_url, self.parsed_based_url)
-                    url_queue.extend(links)
-
-                    # get all text from the page
-                    page_text = soup.get_text(separator=" ")
-
-                    # clean up lines like "Page 2 This is Page 2" or the title line
-                    cleaned_text = self._clean_content(page_text, title)
-
-                    self.writer.add_document(
-                        url=current_url,
-                        content=cleaned_text,
-                        title=title,
-                        teaser=teaser,
-                        description=description,
-                        crawled_at=datetime.now()
-                    )
-        self.writer.commit()
-
-    def search_index(self, query_string: str) -> list:
-        """Parses query and searches index for hits, return results as list.
+        if not os.path.exists(self.index_path):
+            os.makedirs(self.index_path)
+        # full page text and links live next to the index in a compressed store, not in the Whoosh segments
+        self.doc_store = DocStore(os.path.join(self.index_path, "docs.sqlite"))
+        self.result_cache = ResultCache(maxsize=cache_size, ttl=cache_ttl)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._describe_metrics()
+        self._local = threading.local()
+        self.index = None
+        self._searcher = None
+        # number of running requests per searcher, including retired searchers that are closed once unused
+        self._searcher_users = {}
+        self._suggester = None
+        # serializes crawls; the searcher lock only guards swapping the shared searcher, so queries keep being
+        # answered from the previous index generation while a crawl is running
+        self._crawl_lock = threading.Lock()
+        self._searcher_lock = threading.Lock()
+
+    def metrics_text(self) -> str:
+        """Renders crawl, index and search metrics, including the result cache counters, for Prometheus.
+
+        Returns:
+            text (str): Prometheus text exposition.
+        """
+        cache_stats = self.result_cache.stats()
+        return self.metrics.render(extra_counters={
+            "search_cache_hits_total": cache_stats["hits"],
+            "search_cache_misses_total": cache_stats["misses"]
+        })
+
+    def _describe_metrics(self) -> None:
+        """Sets the help texts of the metrics recorded by the crawler and the index pipeline."""
+        for name, help_text in (
+                ("crawler_fetch_seconds", "Time to download and parse a page."),
+                ("crawler_skipped_total", "Pages skipped before or while downloading, by reason."),
+                ("crawler_fetch_errors_total", "Fetches that failed without a (complete) response."),
+                ("crawler_page_errors_total", "Pages that failed with an unexpected error while processing."),
+                ("crawler_fetch_responses_total", "Fetch responses by HTTP status."),
+                ("crawler_fetch_bytes_total", "Bytes downloaded by the crawler."),
+                ("crawler_parse_seconds", "Time spent parsing and cleaning a page."),
+                ("index_write_seconds", "Time to add, update or delete a document in the index writer."),
+                ("index_commit_seconds", "Time to commit a batch to the index and the document store."),
+                ("index_documents_total", "Documents written to the index."),
+                ("search_seconds", "Time per search stage."),
+                ("suggest_seconds", "Time to complete a query prefix."),
+                ("search_queries_total", "Searches, by whether they were answered from the result cache."),
+                ("search_cache_hits_total", "Result cache hits."),
+                ("search_cache_misses_total", "Result cache misses."),
+                ("http_request_seconds", "Time to answer a request of the search app, by endpoint.")):
+            self.metrics.describe(name, help_text)
+
+    def open_index(self) -> bool:
+        """Opens an already built index in `index_path`.
+
+        Returns:
+            (bool): True if an index exists and was opened, False otherwise.
+        """
+        if not exists_in(self.index_path):
+            return False
+        self.index = open_dir(self.index_path)
+        return True
+
+    def ensure_index(self) -> None:
+        """Opens the existing index or, if none was built yet, crawls once to create it."""
+        if self.index is not None:
+            return
+        with self._crawl_lock:
+            if self.index is not None:
+                return
+            if not self.open_index() or self.index.doc_count() == 0:
+                self._crawl()
+
+    def close(self) -> None:
+        """Closes the shared searcher; searchers still in use are closed when their last request finishes."""
+        with self._searcher_lock:
+            self._retire_searcher()
+
+    def crawl(self, incremental: bool = False) -> None:
+        """Crawls the given URL and sub-URLs and (re)creates the Whoosh index.
 
         Args:
-            query_string (str): The search query.
+            incremental (bool): Update the existing index instead of rebuilding it (see `_crawl`).
+        """
+        with self._crawl_lock:
+            self._crawl(incremental=incremental)
+
+    def _crawl(self, incremental: bool = False) -> None:
+        """Crawls the given URL and sub-URLs and creates a Whoosh index; caller holds the crawl lock.
+
+        Pages are fetched and parsed concurrently by `workers` threads sharing one keep-alive connection pool and
+        are handed to an `IndexPipeline`, which writes them in a background thread and commits them in batches.
+
+        An existing index is updated in place: changed pages are replaced via `update_document` and pages that
+        disappeared from the site are deleted, so the index stays searchable during the crawl. In incremental mode,
+        known pages are additionally requested conditionally (If-None-Match / If-Modified-Since), and pages answered
+        with 304 or whose content hash did not change are not re-indexed at all.
+
+        Args:
+            incremental (bool): Only re-index changed pages instead of re-indexing every page.
+        """
+        known_pages = self._load_known_pages()
+        fresh_index = known_pages is None
+        if fresh_index:
+            # no index yet or one with an older schema
+            self.index = create_in(self.index_path, self.schema)
+            self.doc_store.clear()
+            self.doc_store.commit()
+            known_pages = {}
+        pipeline = IndexPipeline(self.index, self.doc_store, batch_size=self.index_batch_size,
+                                 procs=self.index_procs, limitmb=self.index_limitmb,
+                                 multisegment=self.index_multisegment, update=not fresh_index,
+                                 metrics=self.metrics).start()
+        frontier = Frontier(max_depth=self.max_depth, max_pages=self.max_pages)
+        frontier.add(self.url)
+        alive_urls = set()
+        rate_limiter = HostRateLimiter(min_interval=self.host_delay)
+
+        try:
+            with self._create_session() as session, ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # maps running futures to the depth of their page
+                in_flight = {}
+                while frontier or in_flight:
+                    # keep every worker busy without materializing the whole frontier as futures
+                    while frontier and len(in_flight) < 2 * self.workers:
+                        current_url, depth = frontier.pop()
+                        known_page = known_pages.get(current_url) if incremental else None
+                        future = executor.submit(self._process_page, current_url, session, rate_limiter, known_page)
+                        in_flight[future] = depth
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        depth = in_flight.pop(future)
+                        state, page = future.result()
+                        if state in (PAGE_GONE, PAGE_SKIPPED):
+                            continue
+                        alive_urls.add(page["url"])
+                        if state == PAGE_FAILED:
+                            continue
+
+                        # extend the frontier with links not seen before
+                        links = page.pop("links")
+                        for link in links:
+                            frontier.add(link, depth + 1)
+
+                        if state == PAGE_CHANGED:
+                            pipeline.add(page, links)
+
+            # remove pages that are not reachable or not served anymore
+            for url in known_pages.keys() - alive_urls:
+                pipeline.delete(url)
+        finally:
+            self.index_stats = pipeline.finish()
+
+        # a new index (e.g. after a schema change) restarts the generation count, so drop the searcher, the
+        # suggester and cached results explicitly instead of relying on the generation check
+        with self._searcher_lock:
+            self._retire_searcher()
+            self._suggester = None
+        self.result_cache.clear()
+        # build the completion terms now instead of on the first keystroke
+        self._get_suggester()
+
+    def _load_known_pages(self) -> dict:
+        """Opens the existing index and loads the stored fields of every indexed page.
 
         Returns:
-            results (list): A list of search result entries, containing "url, sentence_with_query, title, teaser and
-                            description".
+            known_pages (dict): Maps url to stored fields, or None if the index is missing or has an older schema.
         """
-        results = []
+        if not exists_in(self.index_path):
+            return None
+        self.index = open_dir(self.index_path)
+        if self.index.schema != self.schema:
+            return None
         with self.index.searcher() as searcher:
-            query_parser = QueryParser("content", schema=self.index.schema)
-            query = query_parser.parse(query_string)
-
-            results_query = searcher.search(query, terms=True, limit=50)
+            return {fields["url"]: fields for fields in searcher.all_stored_fields()}
 
-            for hit in results_query:
-                content = hit['content']
-                # find the sentence containing the query term
-                sentence_with_query = self._extract_sentence_with_query(content, query_string)
-
-                results.append([
-                    hit['url'],
-                    sentence_with_query,
-                    hit['title'],
-                    hit['teaser'],
-                    hit['description']
-                ])
-        return results
+    def _process_page(self, current_url: str, session: requests.Session, rate_limiter,
+                      known_page: dict = None) -> tuple:
+        """Fetches and parses a single page; runs in a crawl worker thread.
 
-    @staticmethod
-    def _clean_content(page_text: str, title: str) -> str:
-        """Removes lines that match or contain the page title or start with phrases like 'This is Page' to filter out
-           undesired concatenation.
+        Unexpected errors (e.g. a page the parser cannot handle) only fail this page, not the crawl; like pages that
+        could not be downloaded, the page keeps its previous index entry.
 
         Args:
-            page_text (str): Original text content from the page.
-            title (str): The page title found in <title>.
+            current_url (str): Url of the page.
+            session (requests.Session): Session shared by all workers.
+            rate_limiter (HostRateLimiter): Per-host politeness limiter.
+            known_page (dict): Stored fields of the page from the previous crawl, None if the page is new.
 
         Returns:
-            cleaned_text (str): The cleaned text without the undesired lines.
+            state (str): One of PAGE_CHANGED, PAGE_UNCHANGED, PAGE_GONE, PAGE_SKIPPED or PAGE_FAILED.
+            page (dict): See `_fetch_page`.
         """
-        skip_phrases = [title.lower(), "this is page "]
-        cleaned_lines = []
+        try:
+            return self._fetch_page(current_url, session, rate_limiter, known_page)
+        except Exception as e:
+            self.metrics.inc("crawler_page_errors_total")
+            print(f"Failed to process {current_url}: {type(e).__name__}: {e}")
+            return PAGE_FAILED, {"url": current_url}
 
-        for line in page_text.split('\n'):
-            lower_line = line.strip().lower()
+    def _fetch_page(self, current_url: str, session: requests.Session, rate_limiter,
+                    known_page: dict = None) -> tuple:
+        """Fetches and parses a single page.
 
-            # skips the line if it matches any undesired phrase or starts with them
-            if any(lower_line.startswith(sp) or lower_line == sp for sp in skip_phrases):
-                continue
-            cleaned_lines.append(line.strip())
+        The body is streamed: every chunk is hashed and fed to the parser as it arrives, so a page never has to be
+        held in memory as a whole. Responses with another content type or a Content-Length above `max_page_bytes`
+        are skipped before their body is read; downloads that grow beyond `max_page_bytes` or take longer than
+        `fetch_deadline` are aborted.
 
-        cleaned_text = ". ".join(cleaned_lines)
-        return cleaned_text
+        Args:
+            current_url (str): Url of the page.
+            session (requests.Session): Session shared by all workers.
+            rate_limiter (HostRateLimiter): Per-host politeness limiter.
+            known_page (dict): Stored fields of the page from the previous crawl, None if the page is new.
 
-    @staticmethod
-    def _extract_sentence_with_query(content: str, query: str) -> str:
-        """Extracts the first sentence containing the query from the content.
+        Returns:
+            state (str): One of PAGE_CHANGED, PAGE_UNCHANGED, PAGE_GONE, PAGE_SKIPPED or PAGE_FAILED.
+            page (dict): Index fields of the page including its outgoing "links"; for unchanged pages the stored
+                         fields and links of the previous crawl, None if the page is gone or skipped.
+        """
+        headers = {}
+        if known_page is not None:
+            if known_page.get("etag"):
+                headers["If-None-Match"] = known_page["etag"]
+            headers["If-Modified-Since"] = known_page.get("last_modified") or format_datetime(
+                known_page["crawled_at"].astimezone(timezone.utc), usegmt=True)
+
+        rate_limiter.wait(urlparse(current_url).netloc)
+        fetch_start = time.perf_counter()
+        response = self._fetch_and_parse(current_url, session, headers)
+        if response is None:
+            self.metrics.inc("crawler_fetch_errors_total")
+            return PAGE_FAILED, {"url": current_url}
+        with response:
+            self.metrics.inc("crawler_fetch_responses_total", status=str(response.status_code))
+            if response.status_code == 304 and known_page is not None:
+                return PAGE_UNCHANGED, dict(known_page, links=self.doc_store.get_links(current_url))
+            if response.status_code != 200:
+                return PAGE_GONE, None
+
+            skip_reason = self._skip_reason(response)
+            if skip_reason is None:
+                # links are resolved against the final url in case of redirects
+                parser = create_parser(response.url, self.parsed_based_url, backend=self.parser_backend)
+                content_hash, skip_reason, parse_seconds = self._stream_body(response, parser, fetch_start)
+        if skip_reason == "download_failed":
+            self.metrics.inc("crawler_fetch_errors_total")
+            return PAGE_FAILED, {"url": current_url}
+        if skip_reason is not None:
+            self.metrics.inc("crawler_skipped_total", reason=skip_reason)
+            print(f"Skipped {current_url}: {skip_reason}")
+            return PAGE_SKIPPED, None
+
+        if known_page is not None and known_page["content_hash"] == content_hash:
+            self.metrics.observe("crawler_fetch_seconds", time.perf_counter() - fetch_start, slow_label=current_url)
+            return PAGE_UNCHANGED, dict(known_page, links=self.doc_store.get_links(current_url))
+
+        parse_start = time.perf_counter()
+        # extract title, teaser, meta description, links and text from the single streaming parse
+        parsed_page = parser.result()
+        # clean up lines like "Page 2 This is Page 2" or the title line
+        cleaned_text = self._clean_content(parsed_page.text, parsed_page.title)
+        content_sentence_ends = sentence_ends(cleaned_text)
+        now = time.perf_counter()
+        self.metrics.observe("crawler_parse_seconds", parse_seconds + now - parse_start, slow_label=current_url)
+        self.metrics.observe("crawler_fetch_seconds", now - fetch_start, slow_label=current_url)
+
+        return PAGE_CHANGED, dict(
+            url=current_url,
+            content=cleaned_text,
+            sentence_ends=content_sentence_ends,
+            title=parsed_page.title,
+            teaser=parsed_page.teaser,
+            description=parsed_page.description,
+            crawled_at=datetime.now(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=content_hash,
+            links=sorted(parsed_page.links)
+        )
+
+    def _skip_reason(self, response: requests.Response) -> str:
+        """Checks the response headers, before any of the body is read.
 
         Args:
-            content (str): The full content text.
-            query (str): The search query.
+            response (requests.Response): Streamed response.
 
         Returns:
-            (str): The sentence containing the query  (or a fallback if not found).
+            reason (str): "content_type" or "too_large" if the page should be skipped, None otherwise.
         """
-        sentences = content.split('.')
-        for sentence in sentences:
-            if query.lower() in sentence.lower():
-                return sentence.strip() + '.'
-        return "No matching sentence found."
+        content_type = response.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        if content_type and content_type not in self.content_types:
+            return "content_type"
+        content_length = response.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > self.max_page_bytes:
+            return "too_large"
+        return None
 
-    @staticmethod
-    def _fetch_and_parse(current_url: str) -> str:
-        """Establishes connection to url, fetches and parses website content.
+    def _stream_body(self, response: requests.Response, parser, fetch_start: float) -> tuple:
+        """Downloads the body in chunks, hashing, decoding and parsing every chunk as it arrives.
+
+        Args:
+            response (requests.Response): Streamed response.
+            parser (StreamingPageParser or BufferedPageParser): Parser fed with the decoded chunks.
+            fetch_start (float): `time.perf_counter()` when the request was sent.
 
         Returns:
-            response (str): Current url's content.
+            content_hash (str): SHA-1 of the body.
+            skip_reason (str): "too_large" or "too_slow" if the download was aborted, "download_failed" if the
+                               connection broke, None otherwise.
+            parse_seconds (float): Time spent in the parser.
         """
+        # requests' default for text/* without charset; a missing or unknown charset is decoded as utf-8
+        encoding = response.encoding or "utf-8"
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        content_hash = hashlib.sha1()
+        size = 0
+        parse_seconds = 0.0
         try:
-            with requests.Session() as session:
-                requests.packages.urllib3.util.connection.HAS_IPV6 = False
-                response = session.get(current_url)
-            if response.status_code == 200:
-                return response.text
+            for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+                size += len(chunk)
+                self.metrics.inc("crawler_fetch_bytes_total", len(chunk))
+                if size > self.max_page_bytes:
+                    return None, "too_large", parse_seconds
+                if time.perf_counter() - fetch_start > self.fetch_deadline:
+                    return None, "too_slow", parse_seconds
+                content_hash.update(chunk)
+                parse_start = time.perf_counter()
+                parser.feed(decoder.decode(chunk))
+                parse_seconds += time.perf_counter() - parse_start
+            parse_start = time.perf_counter()
+            parser.feed(decoder.decode(b"", final=True))
+            parse_seconds += time.perf_counter() - parse_start
         except requests.exceptions.RequestException as e:
-            print(f"Failed to fetch {current_url}: {e}")
-        return None
+            print(f"Failed to download {response.url}: {e}")
+            return None, "download_failed", parse_seconds
+        return content_hash.hexdigest(), None, parse_seconds
+
+    def _create_session(self) -> requests.Session:
+        """Creates the session used by all crawl workers, with a keep-alive pool large enough for every worker.
+
+        Returns:
+            session (requests.Session): Shared session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def search_index(self, query_string: str, page: int = 1, pagesize: int = 10) -> dict:
+        """Parses query and searches index for one page of hits.
+
+        Args:
+            query_string (str): The search query.
+            page (int): Number of the result page, starting at 1; clamped to the last page (page 1 if nothing was
+                        found).
+            pagesize (int): Number of hits per page, at most MAX_PAGESIZE.
+
+        Returns:
+            results_page (dict): "query", "total" (number of matching documents), "page", "pagesize", "pagecount"
+                                 (0 if nothing was found), "corrected_query" (spelling correction if nothing was
+                                 found, else None) and "results", a list of entries with "url", "snippet",
+                                 "title", "teaser" and "description" for the hits of the requested page only.
+        """
+        page = max(page, 1)
+        pagesize = min(max(pagesize, 1), MAX_PAGESIZE)
+        timings = self._local.search_timings = {}
+        start = time.perf_counter()
+        with self._use_searcher() as searcher:
+            # opening the index or a new searcher after a commit is a stage of its own, not part of parsing
+            stage_start = time.perf_counter()
+            timings["searcher"] = stage_start - start
+            query_parser = QueryParser("content", schema=searcher.schema)
+            query = query_parser.parse(query_string)
+            timings["parse"] = time.perf_counter() - stage_start
+
+            # the parsed query normalizes whitespace and term case; the generation ties the entry to the index state
+            cache_key = (searcher.reader().generation(), str(query), page, pagesize)
+            results_page = self.result_cache.get(cache_key)
+            if results_page is not None:
+                self._record_search_timings(timings, start, query_string)
+                return results_page
+
+            results = []
+            stage_start = time.perf_counter()
+            results_query = searcher.search_page(query, page, pagelen=pagesize, terms=True)
+            timings["search"] = time.perf_counter() - stage_start
+
+            # look up where the matched terms occur in the hits from the postings instead of re-scanning the content
+            content_terms = {text for fieldname, text in results_query.results.matched_terms()
+                             if fieldname == "content"}
+            stage_start = time.perf_counter()
+            spans = term_spans(searcher.reader(), "content", content_terms, (hit.docnum for hit in results_query))
+
+            for hit in results_query:
+                # find the sentence containing the most query terms; the page text is only loaded if a term matched
+                hit_spans = spans.get(hit.docnum)
+                content = self.doc_store.get_content(hit['url']) if hit_spans else ""
+                sentence_with_query = best_sentence_snippet(content, hit['sentence_ends'], hit_spans)
+
+                results.append({
+                    "url": hit['url'],
+                    "snippet": sentence_with_query,
+                    "title": hit['title'],
+                    "teaser": hit['teaser'],
+                    "description": hit['description']
+                })
+
+            timings["snippets"] = time.perf_counter() - stage_start
+
+            # offer a correction if nothing was found; the corrector only looks up terms in the lexicon
+            corrected_query = None
+            if results_query.total == 0:
+                stage_start = time.perf_counter()
+                correction = searcher.correct_query(query, query_string)
+                if correction.query != query:
+                    corrected_query = correction.string
+                timings["correct"] = time.perf_counter() - stage_start
+
+            results_page = {
+                "query": query_string,
+                "total": results_query.total,
+                # whoosh reports page 0 of 0 if nothing was found
+                "page": max(results_query.pagenum, 1),
+                "pagesize": pagesize,
+                "pagecount": results_query.pagecount,
+                "corrected_query": corrected_query,
+                "results": results
+            }
+            self.result_cache.put(cache_key, results_page)
+            self._record_search_timings(timings, start, query_string)
+            return results_page
+
+    def suggest(self, query_string: str, limit: int = MAX_SUGGESTIONS) -> list:
+        """Completes the last word of a partially typed query from the terms of the index.
+
+        Args:
+            query_string (str): Query typed so far.
+            limit (int): Maximal number of suggestions, at most MAX_SUGGESTIONS are precomputed for short prefixes.
+
+        Returns:
+            suggestions (list(str)): Completed queries, most frequent terms first.
+        """
+        with self.metrics.timer("suggest_seconds"):
+            return self._get_suggester().suggest(query_string, limit)
+
+    def last_search_timings(self) -> dict:
+        """Returns the stage timings of the last `search_index` call of the calling thread.
+
+        Returns:
+            timings (dict): Seconds per stage ("searcher", "parse", "search", "snippets", "correct" if nothing was
+                            found, "total"); empty if nothing was searched.
+        """
+        return getattr(self._local, "search_timings", {})
+
+    def _record_search_timings(self, timings: dict, start: float, query_string: str) -> None:
+        """Adds the total time to the stage timings and records all of them in the metrics."""
+        timings["total"] = time.perf_counter() - start
+        cached = "search" not in timings
+        self.metrics.inc("search_queries_total", cached=str(cached).lower())
+        for stage, seconds in timings.items():
+            self.metrics.observe("search_seconds", seconds, slow_label=query_string if stage == "total" else None,
+                                 stage=stage)
+
+    @contextmanager
+    def _use_searcher(self):
+        """Context manager lending the shared searcher for one request.
+
+        If the index has changed, a new searcher is opened and the previous one is retired: it is closed as soon as
+        the last request still using it has finished, never while a query runs on it.
+
+        Yields:
+            searcher (whoosh.searching.Searcher): Searcher on the latest index generation.
+        """
+        self.ensure_index()
+        with self._searcher_lock:
+            if self._searcher is None or not self._searcher.up_to_date():
+                self._retire_searcher()
+                self._searcher = self.index.searcher()
+                self._searcher_users[self._searcher] = 0
+            searcher = self._searcher
+            self._searcher_users[searcher] += 1
+        try:
+            yield searcher
+        finally:
+            with self._searcher_lock:
+                self._searcher_users[searcher] -= 1
+                if searcher is not self._searcher and self._searcher_users[searcher] == 0:
+                    del self._searcher_users[searcher]
+                    searcher.close()
+
+    def _retire_searcher(self) -> None:
+        """Replaces the shared searcher by None and closes it unless requests are still using it; those close it when
+        they finish. The caller holds the searcher lock."""
+        searcher, self._searcher = self._searcher, None
+        if searcher is not None and self._searcher_users[searcher] == 0:
+            del self._searcher_users[searcher]
+            searcher.close()
+
+    def _get_suggester(self) -> TermSuggester:
+        """Returns the term suggester of the current index generation, rebuilding it from the lexicon if the index
+        has changed.
+
+        Returns:
+            suggester (TermSuggester): Suggester for the content terms.
+        """
+        with self._use_searcher() as searcher:
+            reader = searcher.reader()
+            suggester = self._suggester
+            if suggester is None or suggester.generation != reader.generation():
+                suggester = TermSuggester.from_reader(reader, "content")
+                with self._searcher_lock:
+                    self._suggester = suggester
+        return suggester
+
+    @staticmethod
+    def _clean_content(page_text: str, title: str) -> str:
+        """Removes lines that match or contain the page title or start with phrases like 'This is Page' to filter out
+           undesired concatenation.
+
+        Works in a single pass over the lines: whitespace inside a line is collapsed, empty lines and boilerplate
+        lines are dropped (one prefix check against all skip phrases at once) and lines are joined into sentences.
+
+        Args:
+            page_text (str): Original text content from the page.
+            title (str): The page title found in <title>.
+
+        Returns:
+            cleaned_text (str): The cleaned text without the undesired lines.
+        """
+        title = " ".join((title or "").split()).lower()
+        skip_phrases = (title, SKIP_PAGE_PHRASE) if title else (SKIP_PAGE_PHRASE,)
+        # only the beginning of a line has to be lowercased for the prefix check
+        prefix_length = max(len(phrase) for phrase in skip_phrases)
+
+        # turn tabs and non-breaking spaces into spaces, so runs of spaces are the only thing left to collapse
+        page_text = page_text.replace("\t", " ").replace("\xa0", " ")
+
+        # skips empty lines and lines that match any undesired phrase or start with them
+        cleaned_lines = [
+            line if "  " not in line else " ".join(line.split())
+            for line in map(str.strip, page_text.split('\n'))
+            if line and not line[:prefix_length].lower().startswith(skip_phrases)
+        ]
+
+        # lines already ending a sentence do not need another period
+        cleaned_text = " ".join([line if line.endswith(SENTENCE_ENDINGS) else line + "." for line in cleaned_lines])
+        return cleaned_text
 
     @staticmethod
-    def _extract_links(html: str, base_url: str, parsed_base_url) -> set:
-        """Searches given html string of current url for links.
+    def _fetch_and_parse(current_url: str, session: requests.Session, headers: dict = None) -> requests.Response:
+        """Sends the request over the shared (keep-alive) session; only the headers are read.
 
         Args:
-            html (str): Html content str of current url.
-            base_url (str): String of initial url (starting url of crawling).
-            parsed_base_url (str): Parsed url of initial url (starting url of crawling).
+            current_url (str): Url to fetch.
+            session (requests.Session): Session shared by all crawl workers.
+            headers (dict): Additional request headers, e.g. for conditional requests.
 
         Returns:
-            links (set(str)): Set of links found in current url.
-        """
-        links = set()
-        soup = BeautifulSoup(html, 'html.parser')
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            absolute_url = urljoin(base_url, href)
-            if urlparse(absolute_url).netloc == parsed_base_url.netloc:
-                links.add(absolute_url)
-        return links
+            response (requests.Response): Streamed response of any status, None if the request failed; the caller
+                                          reads the body and closes the response.
+        """
+        try:
+            return session.get(current_url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to fetch {current_url}: {e}")
+        return None
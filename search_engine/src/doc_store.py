@@ -0,0 +1,94 @@
+import os
+import json
+import zlib
+import sqlite3
+import threading
+
+
+class DocStore:
+    """Compressed store for the full text and outgoing links of crawled pages, keyed by url.
+
+    Keeps the page content out of the Whoosh segments, so the inverted index only holds what ranking and snippets
+    need. Every document is zlib-compressed on its own and only decompressed when a result is actually shown.
+    Backed by SQLite, so the crawl can write while the search app reads; each thread uses its own connection.
+
+    Attributes:
+        path (str): Path of the SQLite database file.
+        level (int): zlib compression level (0-9).
+    """
+    def __init__(self, path: str, level: int = 6) -> None:
+        """Constructor."""
+        self.path = path
+        self.level = level
+        self._local = threading.local()
+
+    def put(self, url: str, content: str, links: list) -> None:
+        """Adds or replaces a document; becomes visible to other threads after `commit`.
+
+        Args:
+            url (str): Url of the page.
+            content (str): Cleaned page text.
+            links (list(str)): Outgoing links of the page.
+        """
+        self._connection().execute(
+            "INSERT OR REPLACE INTO docs (url, content, links) VALUES (?, ?, ?)",
+            (url, zlib.compress(content.encode("utf-8"), self.level),
+             zlib.compress(json.dumps(links).encode("utf-8"), self.level)))
+
+    def delete(self, url: str) -> None:
+        """Removes a document.
+
+        Args:
+            url (str): Url of the page.
+        """
+        self._connection().execute("DELETE FROM docs WHERE url = ?", (url,))
+
+    def clear(self) -> None:
+        """Removes all documents."""
+        self._connection().execute("DELETE FROM docs")
+
+    def commit(self) -> None:
+        """Commits pending changes of the calling thread."""
+        self._connection().commit()
+
+    def get_content(self, url: str) -> str:
+        """Loads and decompresses the text of a page.
+
+        Args:
+            url (str): Url of the page.
+
+        Returns:
+            content (str): Cleaned page text, empty if the url is unknown.
+        """
+        row = self._connection().execute("SELECT content FROM docs WHERE url = ?", (url,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else ""
+
+    def get_links(self, url: str) -> list:
+        """Loads the outgoing links of a page.
+
+        Args:
+            url (str): Url of the page.
+
+        Returns:
+            links (list(str)): Outgoing links, empty if the url is unknown.
+        """
+        row = self._connection().execute("SELECT links FROM docs WHERE url = ?", (url,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else []
+
+    def size_bytes(self) -> int:
+        """Returns the size of the database including its write-ahead log in bytes."""
+        return sum(os.path.getsize(path) for path in (self.path, self.path + "-wal") if os.path.exists(path))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the SQLite connection of the calling thread, opening it on first use.
+
+        The database file is only created by the first access, not by the constructor.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS docs (url TEXT PRIMARY KEY, content BLOB NOT NULL, links BLOB NOT NULL)")
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,85 @@
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalizes a url so that different spellings of the same page map to one key.
+
+    Lowercases scheme and host, drops default ports, fragments and trailing slashes (except for the root path) and
+    sorts the query parameters.
+
+    Args:
+        url (str): Absolute url.
+
+    Returns:
+        canonical_url (str): Normalized url.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{credentials}@{netloc}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class Frontier:
+    """FIFO crawl frontier (breadth first) with O(1) enqueue/dequeue and duplicate detection at enqueue time.
+
+    Every url is canonicalized and remembered when it is added, so each page is queued at most once and the queue
+    never holds duplicates.
+
+    Attributes:
+        max_depth (int): Maximal link distance from the start url; None for no limit.
+        max_pages (int): Maximal number of urls ever queued; None for no limit.
+        seen (set(str)): Canonical urls that were queued so far.
+    """
+    def __init__(self, max_depth: int = None, max_pages: int = None) -> None:
+        """Constructor."""
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.seen = set()
+        self._queue = deque()
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """Queues a url unless it was seen before or a limit is reached.
+
+        Args:
+            url (str): Absolute url.
+            depth (int): Link distance from the start url.
+
+        Returns:
+            (bool): True if the url was queued.
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        if self.max_pages is not None and len(self.seen) >= self.max_pages:
+            return False
+        url = canonicalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self._queue.append((url, depth))
+        return True
+
+    def pop(self) -> tuple:
+        """Dequeues the oldest url.
+
+        Returns:
+            url (str): Canonical url.
+            depth (int): Link distance from the start url.
+        """
+        return self._queue.popleft()
+
+    def __len__(self) -> int:
+        """Returns the number of queued urls."""
+        return len(self._queue)
@@ -0,0 +1,169 @@
+import time
+import queue
+import threading
+from search_engine.src.metrics import Metrics
+
+
+_STOP = object()
+
+
+class IndexPipeline:
+    """Writes crawled pages to the Whoosh index and the document store in a background thread.
+
+    The crawl hands over parsed pages through a bounded queue, so fetching never waits for the writer (and the
+    writer never holds more than `queue_size` pending pages). Documents are committed in batches of `batch_size`,
+    so the progress of a crawl is durable and becomes searchable while the crawl is still running. With `procs > 1`
+    Whoosh's multiprocessing writer spreads the indexing work of every batch over several cores.
+
+    Attributes:
+        index (whoosh.index.Index): Index to write to.
+        doc_store (DocStore): Store for page texts and links, committed together with every batch.
+        batch_size (int): Number of index operations per commit.
+        procs (int): Number of indexing processes per batch; 1 uses the regular single-process writer.
+        limitmb (int): Memory limit of the writer (per process) in MB.
+        multisegment (bool): With `procs > 1`, keep one segment per process instead of merging them on commit.
+        update (bool): Replace documents with the same url (`update_document`); False on a fresh index.
+        metrics (Metrics): Records write and commit timings if given.
+        documents (int): Number of documents written so far.
+        deletions (int): Number of documents deleted so far.
+        commits (int): Number of batches committed so far.
+    """
+    def __init__(self, index, doc_store, batch_size: int = 1000, procs: int = 1, limitmb: int = 128,
+                 multisegment: bool = False, update: bool = True, queue_size: int = 1000, metrics: Metrics = None) -> None:
+        """Constructor."""
+        self.index = index
+        self.doc_store = doc_store
+        self.batch_size = batch_size
+        self.procs = procs
+        self.limitmb = limitmb
+        self.multisegment = multisegment
+        self.update = update
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.documents = 0
+        self.deletions = 0
+        self.commits = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="index-pipeline", daemon=True)
+        self._error = None
+        self._start_time = None
+        self._elapsed = 0.0
+        self._busy = 0.0
+
+    def start(self) -> "IndexPipeline":
+        """Starts the writer thread.
+
+        Returns:
+            pipeline (IndexPipeline): The started pipeline.
+        """
+        self._start_time = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def add(self, page: dict, links: list) -> None:
+        """Queues a page for indexing; blocks if the queue is full.
+
+        Args:
+            page (dict): Index fields of the page.
+            links (list(str)): Outgoing links of the page for the document store.
+        """
+        self._raise_error()
+        self._queue.put((page, links))
+
+    def delete(self, url: str) -> None:
+        """Queues the deletion of a page.
+
+        Args:
+            url (str): Url of the page.
+        """
+        self._raise_error()
+        self._queue.put((url, None))
+
+    def finish(self) -> dict:
+        """Commits the remaining documents and stops the writer thread.
+
+        Returns:
+            stats (dict): See `stats`.
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Returns indexing counters and throughput.
+
+        Returns:
+            stats (dict): "documents", "deletions", "commits", "seconds" (wall time), "busy_seconds" (time spent
+                          writing and committing, without waiting for the crawl) and "docs_per_second" (documents
+                          per busy second).
+        """
+        seconds = self._elapsed or (time.perf_counter() - self._start_time if self._start_time else 0.0)
+        return {
+            "documents": self.documents,
+            "deletions": self.deletions,
+            "commits": self.commits,
+            "seconds": round(seconds, 3),
+            "busy_seconds": round(self._busy, 3),
+            "docs_per_second": round(self.documents / self._busy, 1) if self._busy else 0.0
+        }
+
+    def _run(self) -> None:
+        """Writer thread: applies queued operations and commits every `batch_size` operations."""
+        writer = None
+        pending = 0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                busy_start = time.perf_counter()
+                if writer is None:
+                    writer = self.index.writer(procs=self.procs, limitmb=self.limitmb,
+                                               **({"multisegment": self.multisegment} if self.procs > 1 else {}))
+                page, links = item
+                if links is None:
+                    with self.metrics.timer("index_write_seconds", operation="delete"):
+                        writer.delete_by_term("url", page)
+                        self.doc_store.delete(page)
+                    self.deletions += 1
+                else:
+                    with self.metrics.timer("index_write_seconds", operation="update" if self.update else "add"):
+                        self.doc_store.put(page["url"], page["content"], links)
+                        if self.update:
+                            writer.update_document(**page)
+                        else:
+                            writer.add_document(**page)
+                    self.documents += 1
+                    self.metrics.inc("index_documents_total")
+                pending += 1
+                if pending >= self.batch_size:
+                    self._commit(writer)
+                    writer = None
+                    pending = 0
+                self._busy += time.perf_counter() - busy_start
+            if writer is not None:
+                busy_start = time.perf_counter()
+                self._commit(writer)
+                writer = None
+                self._busy += time.perf_counter() - busy_start
+        except BaseException as e:
+            self._error = e
+            if writer is not None:
+                writer.cancel()
+            # keep consuming, so a crawl blocked on the full queue can notice the error
+            while self._queue.get() is not _STOP:
+                pass
+        finally:
+            self._elapsed = time.perf_counter() - self._start_time
+
+    def _commit(self, writer) -> None:
+        """Commits the document store and then the index batch."""
+        with self.metrics.timer("index_commit_seconds"):
+            self.doc_store.commit()
+            writer.commit()
+        self.commits += 1
+
+    def _raise_error(self) -> None:
+        """Re-raises an error of the writer thread in the calling thread."""
+        if self._error is not None:
+            raise RuntimeError("Indexing failed") from self._error
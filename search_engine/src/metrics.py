@@ -0,0 +1,146 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+# upper bounds of the latency histogram buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """Thread-safe registry of counters and latency histograms, rendered in the Prometheus text format.
+
+    Metrics are created on first use; every combination of label values is its own series.
+
+    Attributes:
+        buckets (tuple(float)): Upper bounds of the histogram buckets in seconds.
+        slow_threshold (float): Observations of histograms with a `slow_label` that take longer than this many
+                                seconds are printed, so slow pages and queries can be found; None disables it.
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, slow_threshold: float = None) -> None:
+        """Constructor."""
+        self.buckets = buckets
+        self.slow_threshold = slow_threshold
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Sets the help text of a metric.
+
+        Args:
+            name (str): Metric name.
+            help_text (str): Description shown in the exposition.
+        """
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increments a counter.
+
+        Args:
+            name (str): Metric name, should end with "_total".
+            value (float): Increment.
+            **labels: Label values of the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def total(self, name: str) -> float:
+        """Returns the sum of a counter over all its label values.
+
+        Args:
+            name (str): Metric name.
+
+        Returns:
+            total (float): Counter total, 0 if it was never incremented.
+        """
+        with self._lock:
+            return sum(value for (series_name, _), value in self._counters.items() if series_name == name)
+
+    def observe(self, name: str, seconds: float, slow_label: str = None, **labels) -> None:
+        """Records a duration in a histogram.
+
+        Args:
+            name (str): Metric name, should end with "_seconds".
+            seconds (float): Observed duration.
+            slow_label (str): Identifies the observation (e.g. url or query) if it exceeds `slow_threshold`.
+            **labels: Label values of the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect_left(self.buckets, seconds)] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+        if slow_label is not None and self.slow_threshold is not None and seconds > self.slow_threshold:
+            print(f"Slow {name} ({seconds:.3f}s): {slow_label}")
+
+    @contextmanager
+    def timer(self, name: str, slow_label: str = None, **labels):
+        """Context manager that observes the duration of its block in a histogram.
+
+        Args:
+            name (str): Metric name.
+            slow_label (str): See `observe`.
+            **labels: Label values of the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, slow_label=slow_label, **labels)
+
+    def render(self, extra_counters: dict = None) -> str:
+        """Renders all metrics in the Prometheus text exposition format.
+
+        Args:
+            extra_counters (dict): Additional counter values by metric name, e.g. from other components.
+
+        Returns:
+            text (str): Exposition text.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(buckets), total, count)
+                          for key, (buckets, total, count) in self._histograms.items()}
+        for name, value in (extra_counters or {}).items():
+            counters[(name, ())] = value
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            self._render_header(lines, name, "counter")
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            self._render_header(lines, name, "histogram")
+            for (series_name, labels), (buckets, total, count) in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), buckets):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _render_header(self, lines: list, name: str, metric_type: str) -> None:
+        """Appends the HELP and TYPE lines of a metric."""
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _format_labels(labels: tuple) -> str:
+    """Formats (name, value) pairs as a Prometheus label set."""
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
@@ -0,0 +1,289 @@
+from html.parser import HTMLParser
+from urllib.parse import urlparse, urljoin
+from bs4 import BeautifulSoup
+from search_engine.src.frontier import canonicalize_url
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+NO_TEASER = "No teaser available"
+NO_DESCRIPTION = "No description available"
+
+# text inside these tags is not part of the visible page text
+_INVISIBLE_TAGS = {"script", "style", "template"}
+
+
+class ParsedPage:
+    """Everything the crawler extracts from one html page.
+
+    Attributes:
+        title (str): Content of <title>, or the page url if there is none.
+        teaser (str): Text of the first <p>.
+        description (str): Content of <meta name="description">.
+        links (set(str)): Absolute urls of all links to the crawled site.
+        text (str): Visible page text; text nodes are joined by spaces, line breaks are kept.
+    """
+    __slots__ = ("title", "teaser", "description", "links", "text")
+
+    def __init__(self, title: str, teaser: str, description: str, links: set, text: str) -> None:
+        """Constructor."""
+        self.title = title
+        self.teaser = teaser
+        self.description = description
+        self.links = links
+        self.text = text
+
+
+def parse_page(html: str, page_url: str, parsed_base_url, backend: str = "stream") -> ParsedPage:
+    """Parses an html page once and extracts title, teaser, meta description, links and text.
+
+    Args:
+        html (str): Html content of the page.
+        page_url (str): Url of the page, used to resolve relative links and as fallback title.
+        parsed_base_url: Parsed url of the crawl start; only links to its host are kept.
+        backend (str): "stream" (streaming `html.parser.HTMLParser`, no tree is built), "lxml" (requires lxml)
+                       or "bs4" (one BeautifulSoup tree, reference implementation).
+
+    Returns:
+        page (ParsedPage): Extracted page fields.
+    """
+    try:
+        parse = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend '{backend}', choose one of {sorted(BACKENDS)}.")
+    return parse(html, page_url, parsed_base_url)
+
+
+def create_parser(page_url: str, parsed_base_url, backend: str = "stream"):
+    """Creates an incremental parser, so a page can be parsed chunk by chunk while it is downloaded.
+
+    The "stream" backend parses every chunk as it arrives; the tree based backends collect the chunks and parse
+    them in `result`.
+
+    Args:
+        page_url (str): Url of the page, used to resolve relative links and as fallback title.
+        parsed_base_url: Parsed url of the crawl start; only links to its host are kept.
+        backend (str): See `parse_page`.
+
+    Returns:
+        parser (StreamingPageParser or BufferedPageParser): Parser with `feed(html_chunk)` and `result()`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend '{backend}', choose one of {sorted(BACKENDS)}.")
+    if backend == "stream":
+        return StreamingPageParser(page_url, parsed_base_url)
+    return BufferedPageParser(page_url, parsed_base_url, backend)
+
+
+def _filter_links(hrefs, page_url: str, parsed_base_url) -> set:
+    """Resolves hrefs against the page url and keeps links to the crawled host.
+
+    Links are canonicalized like the frontier does, so other spellings of the crawled host (upper case, explicit
+    default port) count as the same site; links with an invalid port are dropped.
+
+    Args:
+        hrefs (iterable(str)): Raw href attribute values.
+        page_url (str): Url of the page containing the links.
+        parsed_base_url: Parsed url of the crawl start.
+
+    Returns:
+        links (set(str)): Canonical absolute urls on the crawled host.
+    """
+    base_netloc = urlparse(canonicalize_url(parsed_base_url.geturl())).netloc
+    links = set()
+    for href in hrefs:
+        try:
+            canonical_url = canonicalize_url(urljoin(page_url, href))
+        except ValueError:
+            continue
+        if urlparse(canonical_url).netloc == base_netloc:
+            links.add(canonical_url)
+    return links
+
+
+def _parse_bs4(html: str, page_url: str, parsed_base_url) -> ParsedPage:
+    """BeautifulSoup backend; builds a single tree and reads every field from it."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title = soup.title.string if soup.title else page_url
+    teaser_elem = soup.find('p')
+    teaser = teaser_elem.text if teaser_elem else NO_TEASER
+    meta_description = soup.find('meta', attrs={'name': 'description'})
+    description = meta_description.get('content', NO_DESCRIPTION) if meta_description else NO_DESCRIPTION
+    links = _filter_links((a_tag['href'] for a_tag in soup.find_all('a', href=True)), page_url, parsed_base_url)
+    text = soup.get_text(separator=" ")
+    return ParsedPage(title, teaser, description, links, text)
+
+
+def _parse_lxml(html: str, page_url: str, parsed_base_url) -> ParsedPage:
+    """lxml backend; libxml2 builds the tree in C, which is considerably faster than BeautifulSoup."""
+    if lxml is None:
+        raise ImportError("The 'lxml' parser backend requires lxml; install it with 'pip install lxml'.")
+    if not html.strip():
+        return ParsedPage(page_url, NO_TEASER, NO_DESCRIPTION, set(), "")
+    root = lxml.html.document_fromstring(html)
+
+    title_elem = root.find(".//title")
+    title = title_elem.text if title_elem is not None and title_elem.text else page_url
+    teaser_elem = root.find(".//p")
+    teaser = teaser_elem.text_content() if teaser_elem is not None else NO_TEASER
+    descriptions = root.xpath("//meta[@name='description']/@content")
+    description = descriptions[0] if descriptions else NO_DESCRIPTION
+    links = _filter_links(root.xpath("//a/@href"), page_url, parsed_base_url)
+    for elem in root.iter(*_INVISIBLE_TAGS):
+        elem.text = None
+    text = " ".join(root.itertext())
+    return ParsedPage(title, teaser, description, links, text)
+
+
+class StreamingPageParser(HTMLParser):
+    """Event based html parser that collects the page fields while reading the html once, without building a tree.
+
+    Html can be fed in chunks (`feed`), so a page can be processed while it is being downloaded.
+
+    Attributes:
+        page_url (str): Url of the page.
+        parsed_base_url: Parsed url of the crawl start.
+    """
+    def __init__(self, page_url: str, parsed_base_url) -> None:
+        """Constructor."""
+        super().__init__(convert_charrefs=True)
+        self.page_url = page_url
+        self.parsed_base_url = parsed_base_url
+        self._title = None
+        self._teaser = None
+        self._description = None
+        self._hrefs = []
+        self._text = []
+        # text of one node can arrive in several `handle_data` calls when the html is fed in chunks; the separator
+        # is only added when a new node starts
+        self._in_text_node = False
+        self._in_title = False
+        self._in_teaser = False
+        self._invisible_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        """Tracks title, first paragraph, invisible tags, meta description and links."""
+        self._in_text_node = False
+        if tag in _INVISIBLE_TAGS:
+            self._invisible_depth += 1
+        elif tag == "title" and self._title is None:
+            self._in_title = True
+            self._title = []
+        elif tag == "p":
+            if self._teaser is None:
+                self._in_teaser = True
+                self._teaser = []
+            else:
+                self._in_teaser = False
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href is not None:
+                self._hrefs.append(href)
+        elif tag == "meta" and self._description is None:
+            attrs = dict(attrs)
+            if attrs.get("name") == "description":
+                self._description = attrs.get("content") or NO_DESCRIPTION
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        """Self-closing tags (e.g. <meta ... />) never contain text."""
+        self._in_text_node = False
+        if tag in ("meta", "a"):
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        """Closes title, first paragraph and invisible tags."""
+        self._in_text_node = False
+        if tag in _INVISIBLE_TAGS:
+            self._invisible_depth = max(self._invisible_depth - 1, 0)
+        elif tag == "title":
+            self._in_title = False
+        elif tag == "p":
+            self._in_teaser = False
+
+    def handle_comment(self, data: str) -> None:
+        """Comments end the current text node."""
+        self._in_text_node = False
+
+    def handle_decl(self, decl: str) -> None:
+        """Declarations end the current text node."""
+        self._in_text_node = False
+
+    def handle_pi(self, data: str) -> None:
+        """Processing instructions end the current text node."""
+        self._in_text_node = False
+
+    def unknown_decl(self, data: str) -> None:
+        """CDATA sections and other unknown declarations end the current text node."""
+        self._in_text_node = False
+
+    def handle_data(self, data: str) -> None:
+        """Collects text of the page, the title and the first paragraph."""
+        if self._invisible_depth:
+            return
+        if self._in_title:
+            self._title.append(data)
+        elif self._in_teaser:
+            self._teaser.append(data)
+        if self._text and not self._in_text_node:
+            self._text.append(" ")
+        self._text.append(data)
+        self._in_text_node = True
+
+    def result(self) -> ParsedPage:
+        """Finishes parsing and returns the extracted page.
+
+        Returns:
+            page (ParsedPage): Extracted page fields.
+        """
+        self.close()
+        title = "".join(self._title) if self._title else self.page_url
+        teaser = "".join(self._teaser) if self._teaser is not None else NO_TEASER
+        description = self._description or NO_DESCRIPTION
+        links = _filter_links(self._hrefs, self.page_url, self.parsed_base_url)
+        return ParsedPage(title, teaser, description, links, "".join(self._text))
+
+
+class BufferedPageParser:
+    """Incremental interface for the tree based backends: collects the fed chunks and parses the page at the end.
+
+    Attributes:
+        page_url (str): Url of the page.
+        parsed_base_url: Parsed url of the crawl start.
+        backend (str): "lxml" or "bs4".
+    """
+    def __init__(self, page_url: str, parsed_base_url, backend: str) -> None:
+        """Constructor."""
+        self.page_url = page_url
+        self.parsed_base_url = parsed_base_url
+        self.backend = backend
+        self._chunks = []
+
+    def feed(self, html: str) -> None:
+        """Collects a chunk of html."""
+        self._chunks.append(html)
+
+    def result(self) -> ParsedPage:
+        """Parses the collected html and returns the extracted page.
+
+        Returns:
+            page (ParsedPage): Extracted page fields.
+        """
+        return parse_page("".join(self._chunks), self.page_url, self.parsed_base_url, backend=self.backend)
+
+
+def _parse_stream(html: str, page_url: str, parsed_base_url) -> ParsedPage:
+    """Streaming backend based on the standard library `html.parser`."""
+    parser = StreamingPageParser(page_url, parsed_base_url)
+    parser.feed(html)
+    return parser.result()
+
+
+BACKENDS = {
+    "stream": _parse_stream,
+    "lxml": _parse_lxml,
+    "bs4": _parse_bs4,
+}
@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Thread-safe LRU cache with time-to-live for search results.
+
+    Keys should contain the index generation the results were computed on, so entries of an older generation are
+    never returned after a commit; `clear` drops them eagerly.
+
+    Attributes:
+        maxsize (int): Maximal number of cached entries; the least recently used entry is evicted first.
+        ttl (float): Time-to-live of an entry in seconds.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that had to be computed.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0) -> None:
+        """Constructor."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value of `key` and marks it as recently used.
+
+        Args:
+            key (hashable): Cache key.
+
+        Returns:
+            value: Cached value, None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value) -> None:
+        """Caches `value` under `key`, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (hashable): Cache key.
+            value: Value to cache.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache counters.
+
+        Returns:
+            stats (dict): Number of "hits", "misses" and cached "entries".
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -1,15 +1,53 @@
 import sys
 import pathlib
 
-sys.path.append(str(pathlib.Path(__file__).parent.parent))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
 
+import os
+import time
+import argparse
 from search_engine.src.crawler import Crawler
-from flask import Flask, render_template, request
+from search_engine.src.page_parser import BACKENDS
+from search_engine.src.suggestions import MAX_SUGGESTIONS
+from flask import Flask, render_template, request, jsonify, g, Response
 
 
 template_folder = "../templates_search_engine"
 app = Flask(__name__, template_folder=template_folder)
 
+DEFAULT_PAGESIZE = 10
+START_URL = os.environ.get("SEARCH_ENGINE_URL", "https://vm009.rz.uos.de/crawl/index.html")
+# add a Server-Timing header with the search stage timings to every search response
+app.config["SERVER_TIMING"] = os.environ.get("SEARCH_ENGINE_SERVER_TIMING", "") not in ("", "0")
+
+# one crawler (and with it one index and one shared searcher) for the lifetime of the app
+crawler = Crawler(url=START_URL)
+
+
+@app.before_request
+def start_timer() -> None:
+    """Remembers the start time of the request."""
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response: Response) -> Response:
+    """Records the request latency per endpoint and adds the Server-Timing header to search responses if enabled.
+
+    Args:
+        response (flask.Response): Response of the request.
+
+    Returns:
+        response (flask.Response): The response, possibly with a Server-Timing header.
+    """
+    seconds = time.perf_counter() - g.get("request_start", time.perf_counter())
+    crawler.metrics.observe("http_request_seconds", seconds, endpoint=request.endpoint or "none")
+    if app.config["SERVER_TIMING"] and request.endpoint in ("search", "api_search"):
+        timings = dict(crawler.last_search_timings(), app=seconds)
+        response.headers["Server-Timing"] = ", ".join(
+            f"{stage};dur={stage_seconds * 1000:.2f}" for stage, stage_seconds in timings.items())
+    return response
+
 
 @app.route('/')
 def home() -> str:
@@ -23,25 +61,133 @@ def home() -> str:
 
 @app.route('/search', methods=['GET'])
 def search() -> str:
-    """Run search engine.
+    """Run search engine on the persisted index and render one page of results.
 
     Returns:
         html_content (str): Html string of content to display or error-string to display.
     """
-    crawler = Crawler(url="https://vm009.rz.uos.de/crawl/index.html")
-    crawler.crawl()
-
     query = request.args.get('q')
     if query:
-        search_results = crawler.search_index(query_string=query)
+        results_page = crawler.search_index(
+            query_string=query,
+            page=request.args.get('page', 1, type=int),
+            pagesize=request.args.get('pagesize', DEFAULT_PAGESIZE, type=int)
+        )
         return render_template(
             "search_engine_results.html",
-            results=search_results,
+            results=results_page["results"],
+            results_page=results_page,
             query=query
         )
     else:
         return 'No search query provided.'
 
 
+@app.route('/api/search', methods=['GET'])
+def api_search():
+    """JSON search endpoint; returns only the requested window of hits plus the total hit count.
+
+    Returns:
+        response (flask.Response): JSON object with "query", "total", "page", "pagesize", "pagecount" and "results".
+    """
+    query = request.args.get('q')
+    if not query:
+        return jsonify({"error": "No search query provided."}), 400
+    return jsonify(crawler.search_index(
+        query_string=query,
+        page=request.args.get('page', 1, type=int),
+        pagesize=request.args.get('pagesize', DEFAULT_PAGESIZE, type=int)
+    ))
+
+
+@app.route('/suggest', methods=['GET'])
+def suggest():
+    """Type-ahead endpoint; completes the last word of the query from the terms of the index.
+
+    Returns:
+        response (flask.Response): JSON object with "query" and "suggestions", a list of completed queries.
+    """
+    query = request.args.get('q', '')
+    return jsonify({
+        "query": query,
+        "suggestions": crawler.suggest(query, limit=request.args.get('limit', MAX_SUGGESTIONS, type=int))
+    })
+
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """Returns the hit and miss counters of the search result cache.
+
+    Returns:
+        response (flask.Response): JSON object with "hits", "misses" and "entries".
+    """
+    return jsonify(crawler.result_cache.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics() -> Response:
+    """Exposes crawl, index, search and request metrics in the Prometheus text format.
+
+    Returns:
+        response (flask.Response): Prometheus text exposition.
+    """
+    return Response(crawler.metrics_text(), mimetype="text/plain; version=0.0.4")
+
+
+def main() -> None:
+    """Parses command line arguments, builds the index if requested or missing and runs the Flask app."""
+    global crawler
+
+    parser = argparse.ArgumentParser(description="Crawl a website into a Whoosh index and serve a search page.")
+    parser.add_argument("--url", default=START_URL,
+                        help="Start url of the crawl (default: $SEARCH_ENGINE_URL or the university test site).")
+    parser.add_argument("--crawl", action="store_true", help="(Re)build the index at startup before serving.")
+    parser.add_argument("--crawl-only", action="store_true", help="(Re)build the index and exit without serving.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --crawl/--crawl-only: only re-index changed pages and drop removed ones.")
+    parser.add_argument("--workers", type=int, default=crawler.workers, help="Number of concurrent crawl workers.")
+    parser.add_argument("--host-delay", type=float, default=crawler.host_delay,
+                        help="Minimal seconds between two requests to the same host.")
+    parser.add_argument("--parser", choices=sorted(BACKENDS), default=crawler.parser_backend,
+                        help="Html parser backend used while crawling.")
+    parser.add_argument("--max-depth", type=int, default=crawler.max_depth,
+                        help="Maximal link distance from the start url (default: unlimited).")
+    parser.add_argument("--max-pages", type=int, default=crawler.max_pages,
+                        help="Maximal number of pages to crawl (default: unlimited).")
+    parser.add_argument("--index-procs", type=int, default=crawler.index_procs,
+                        help="Number of indexing processes (Whoosh multiprocessing writer if > 1).")
+    parser.add_argument("--batch-size", type=int, default=crawler.index_batch_size,
+                        help="Number of documents per index commit.")
+    parser.add_argument("--max-page-mb", type=float, default=crawler.max_page_bytes / 1024 / 1024,
+                        help="Skip pages larger than this many MB (the download is aborted at this size).")
+    parser.add_argument("--server-timing", action="store_true", default=app.config["SERVER_TIMING"],
+                        help="Add a Server-Timing header with the search stage timings to search responses.")
+    parser.add_argument("--slow-threshold", type=float, default=crawler.metrics.slow_threshold,
+                        help="Print fetches, parses and queries that take longer than this many seconds.")
+    args = parser.parse_args()
+
+    if args.url != START_URL:
+        crawler = Crawler(url=args.url)
+    crawler.workers = args.workers
+    crawler.host_delay = args.host_delay
+    crawler.parser_backend = args.parser
+    crawler.max_depth = args.max_depth
+    crawler.max_pages = args.max_pages
+    crawler.index_procs = args.index_procs
+    crawler.index_batch_size = args.batch_size
+    crawler.max_page_bytes = int(args.max_page_mb * 1024 * 1024)
+    crawler.metrics.slow_threshold = args.slow_threshold
+    app.config["SERVER_TIMING"] = args.server_timing
+    if args.crawl or args.crawl_only:
+        crawler.crawl(incremental=args.incremental)
+        print(f"Indexing: {crawler.index_stats}")
+    else:
+        crawler.ensure_index()
+
+    if not args.crawl_only:
+        # the reloader would start a second process that crawls again
+        app.run(debug=True, use_reloader=False)
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    main()
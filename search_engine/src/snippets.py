@@ -0,0 +1,98 @@
+import re
+from html import escape
+from bisect import bisect_right
+from collections import defaultdict
+from whoosh.reading import TermNotFound
+
+
+NO_SNIPPET = "No matching sentence found."
+
+# characters ending a sentence; the crawler ends every text line with one of them, snippets split after them when
+# whitespace follows
+SENTENCE_ENDINGS = (".", "!", "?")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[{}])\s+".format(re.escape("".join(SENTENCE_ENDINGS))))
+
+
+def sentence_ends(text: str) -> list:
+    """Computes the sentence boundaries of a text once at index time.
+
+    Args:
+        text (str): Cleaned page content.
+
+    Returns:
+        ends (list(int)): Ascending character offsets at which each sentence ends (exclusive); the last entry is
+                          the text length.
+    """
+    ends = [match.start() for match in _SENTENCE_BOUNDARY.finditer(text)]
+    ends.append(len(text))
+    return ends
+
+
+def term_spans(reader, fieldname: str, terms, docnums) -> dict:
+    """Looks up the character spans of the given terms in the given documents from the term postings.
+
+    The field must be indexed with `chars=True`. Every term's posting list is walked once in docnum order, so the
+    cost depends on the number of terms and hits, not on the size of the documents.
+
+    Args:
+        reader (whoosh.reading.IndexReader): Reader of the searched index.
+        fieldname (str): Name of the text field.
+        terms (iterable(bytes)): Matched terms (as indexed, i.e. lowercased and stemmed by the analyzer).
+        docnums (iterable(int)): Document numbers of the hits.
+
+    Returns:
+        spans (dict): Maps docnum to a list of (startchar, endchar, term) tuples.
+    """
+    spans = defaultdict(list)
+    docnums = sorted(set(docnums))
+    for term in terms:
+        try:
+            matcher = reader.postings(fieldname, term)
+        except TermNotFound:
+            continue
+        for docnum in docnums:
+            if not matcher.is_active():
+                break
+            if matcher.id() < docnum:
+                matcher.skip_to(docnum)
+                if not matcher.is_active():
+                    break
+            if matcher.id() == docnum:
+                spans[docnum].extend((start, end, term) for _, start, end in matcher.value_as("characters"))
+    return spans
+
+
+def best_sentence_snippet(content: str, ends: list, spans: list) -> str:
+    """Returns the sentence containing the most distinct query terms with the terms highlighted.
+
+    Args:
+        content (str): Page content the spans refer to.
+        ends (list(int)): Sentence end offsets of the content, see `sentence_ends`.
+        spans (list(tuple)): (startchar, endchar, term) of every query term occurrence in the content.
+
+    Returns:
+        snippet (str): Html-escaped sentence with <b>-highlighted terms, or a fallback text if nothing matched.
+    """
+    if not spans:
+        return NO_SNIPPET
+
+    # group term occurrences by sentence
+    sentences = defaultdict(list)
+    for span in spans:
+        sentences[bisect_right(ends, span[0])].append(span)
+
+    # prefer sentences matching more distinct terms, then more occurrences, then earlier sentences
+    index = min(sentences, key=lambda i: (-len({term for _, _, term in sentences[i]}), -len(sentences[i]), i))
+    start = ends[index - 1] if index > 0 else 0
+    end = ends[index] if index < len(ends) else len(content)
+
+    parts = []
+    position = start
+    for span_start, span_end, _ in sorted(sentences[index]):
+        if span_start < position:
+            continue
+        parts.append(escape(content[position:span_start]))
+        parts.append("<b>" + escape(content[span_start:span_end]) + "</b>")
+        position = span_end
+    parts.append(escape(content[position:end]))
+    return "".join(parts).strip()
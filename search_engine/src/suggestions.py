@@ -0,0 +1,89 @@
+import heapq
+from bisect import bisect_left
+
+
+MAX_SUGGESTIONS = 10
+
+# completions of prefixes up to this length are ranked when the suggester is built, longer prefixes match few
+# enough terms to rank them per request
+_PRECOMPUTED_PREFIX_LENGTH = 2
+
+
+class TermSuggester:
+    """Prefix completion over the terms of one index field, kept in memory as a sorted term array.
+
+    Built from the lexicon of a reader (term texts and document frequencies only, the postings are never read), so
+    building it costs one pass over the terms of the field and a lookup is a binary search. Completions are ranked
+    by document frequency.
+
+    Attributes:
+        generation (int): Index generation the terms were read from.
+        terms (list(str)): Terms of the field in sorted order.
+        frequencies (list(int)): Document frequency of each term.
+    """
+    def __init__(self, terms: list, frequencies: list, generation: int = -1) -> None:
+        """Constructor."""
+        self.generation = generation
+        self.terms = terms
+        self.frequencies = frequencies
+        self._top_completions = {}
+        for i in sorted(range(len(terms)), key=frequencies.__getitem__, reverse=True):
+            term = terms[i]
+            for length in range(1, min(len(term), _PRECOMPUTED_PREFIX_LENGTH) + 1):
+                completions = self._top_completions.setdefault(term[:length], [])
+                if len(completions) < MAX_SUGGESTIONS:
+                    completions.append(term)
+
+    @classmethod
+    def from_reader(cls, reader, fieldname: str) -> "TermSuggester":
+        """Reads the terms of a field from the lexicon of an index reader.
+
+        Args:
+            reader (whoosh.reading.IndexReader): Reader of the index.
+            fieldname (str): Name of the text field.
+
+        Returns:
+            suggester (TermSuggester): Suggester for the terms of the field.
+        """
+        terms = []
+        frequencies = []
+        # the lexicon is stored in sorted order
+        for text, terminfo in reader.iter_field(fieldname):
+            terms.append(text.decode("utf-8") if isinstance(text, bytes) else text)
+            frequencies.append(terminfo.doc_frequency())
+        return cls(terms, frequencies, generation=reader.generation())
+
+    def complete(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> list:
+        """Returns the most frequent terms starting with `prefix`.
+
+        Args:
+            prefix (str): Lowercase term prefix.
+            limit (int): Maximal number of completions.
+
+        Returns:
+            completions (list(str)): Terms ordered by descending document frequency.
+        """
+        if not prefix or limit <= 0:
+            return []
+        if len(prefix) <= _PRECOMPUTED_PREFIX_LENGTH and limit <= MAX_SUGGESTIONS:
+            return self._top_completions.get(prefix, [])[:limit]
+        start = bisect_left(self.terms, prefix)
+        # every term starting with the prefix sorts before the prefix followed by the highest code point
+        end = bisect_left(self.terms, prefix + "\U0010ffff", lo=start)
+        return [self.terms[i] for i in heapq.nlargest(limit, range(start, end), key=self.frequencies.__getitem__)]
+
+    def suggest(self, query_string: str, limit: int = MAX_SUGGESTIONS) -> list:
+        """Completes the last word of a query.
+
+        Args:
+            query_string (str): Query typed so far.
+            limit (int): Maximal number of suggestions.
+
+        Returns:
+            suggestions (list(str)): Query strings with the last word completed.
+        """
+        if not query_string or query_string[-1].isspace():
+            return []
+        head, _, last_word = query_string.lower().rpartition(" ")
+        head = head + " " if head else ""
+        return [head + term for term in self.complete(last_word, limit)]